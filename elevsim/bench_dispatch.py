@@ -0,0 +1,93 @@
+'''
+        benchmark of the elevator dispatch distance computation
+
+        compares, for growing fleets, the scalar `_get_dist` loop with
+        the vectorized `ElevatorList.distances` for one request and for
+        a batch of requests, after checking that they agree;  eta is
+        the whole choice of an EtaLoadPenalty strategy per request
+
+        usage:  python bench_dispatch.py [floor_count]
+'''
+
+import random
+import timeit
+from sys import argv
+
+import numpy as np
+
+from elevsim3 import BDir, ElevatorList, EtaLoadPenalty
+from simconfig import compile_config
+from simstats import SimStats
+
+
+def make_fleet(nelevs, nfloors, rng):
+    ''' ElevatorList with the elevators at random floors and directions '''
+    config = {'running_time' : 1,
+              'floor_count'  : nfloors,
+              'elevators'    : [{'name'          : 'elev.{}'.format(i + 1),
+                                 'floors_served' : nfloors,
+                                 'maxriders'     : 10}
+                                for i in range(nelevs)]}
+    elevlist = ElevatorList(compile_config(config), SimStats(nelevs))
+    for i in range(nelevs):
+        e = elevlist[i]
+        e.curfloor = rng.randrange(nfloors)
+        if e.curfloor == 0:
+            e.curdir = BDir.UP
+        elif e.curfloor == nfloors - 1:
+            e.curdir = BDir.DOWN
+        else:
+            e.curdir = rng.choice([BDir.UP, BDir.DOWN])
+        elevlist.update_position(e)
+    return elevlist
+
+
+def scalar_distances(elevlist, reqfloor, reqdir):
+    return [elevlist._get_dist(elevlist[i], reqfloor, reqdir,
+                               elevlist.max_dist)
+            for i in range(elevlist.elev_count)]
+
+
+def check(elevlist, reqs):
+    ''' the vectorized distances must equal the scalar ones '''
+    floors = np.array([r[0] for r in reqs])
+    ups = np.array([r[1] == BDir.UP for r in reqs])
+    batch = elevlist.distances(floors, ups)
+    for k, (reqfloor, reqdir) in enumerate(reqs):
+        expected = scalar_distances(elevlist, reqfloor, reqdir)
+        assert elevlist.distances(reqfloor, reqdir).tolist() == expected
+        assert batch[k].tolist() == expected
+
+
+def main(nfloors=200, nreqs=1000):
+    rng = random.Random(1)
+    reqs = [(f, rng.choice([BDir.UP, BDir.DOWN])) for f in
+            (rng.randrange(1, nfloors - 1) for i in range(nreqs))]
+    floors = np.array([r[0] for r in reqs])
+    ups = np.array([r[1] == BDir.UP for r in reqs])
+
+    print('{} floors, times per request in microseconds'.format(nfloors))
+    print('{:>7} {:>10} {:>10} {:>10} {:>10}'.format(
+          'elevs', 'scalar', 'vector', 'batch', 'eta'))
+    eta = EtaLoadPenalty()
+    for nelevs in (4, 16, 64, 256, 1024):
+        elevlist = make_fleet(nelevs, nfloors, rng)
+        check(elevlist, reqs[:50])
+
+        t_scalar = timeit.timeit(
+            lambda: [scalar_distances(elevlist, f, d) for f, d in reqs],
+            number=1)
+        t_vector = timeit.timeit(
+            lambda: [elevlist.distances(f, d) for f, d in reqs],
+            number=1)
+        t_batch = timeit.timeit(
+            lambda: elevlist.distances(floors, ups), number=1)
+        t_eta = timeit.timeit(
+            lambda: [eta.choose(elevlist, f, d) for f, d in reqs], number=1)
+        print('{:7d} {:10.2f} {:10.2f} {:10.2f} {:10.2f}'.format(
+              nelevs, *(1e6 * t / nreqs 
+                        for t in (t_scalar, t_vector, t_batch, t_eta))))
+
+
+if __name__ == "__main__":
+    main(int(argv[1]) if len(argv) == 2 else 200)
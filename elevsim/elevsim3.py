@@ -4,15 +4,32 @@
         configuration for the simulation objects:   
             specified in the commandline as the first argument
             or uses the default configuration
+            validated against `elevsim_schema.yml` and compiled into
+            settings before the run starts (see simconfig.py)
 
         logging:
             configuration is in `logging.cfg`
             simulation event logging is written to `sim_events.log`
+            through a buffered `simevents.EventSink`
             application events (which are few) to `sim_app.log`
+            the console visualization is turned off by `visualize : no`
+
+        simulated time:
+            with `virtual_time : yes` in the config the event loop runs
+            on a virtual clock, so the asyncio.sleep delays cost no wall
+            time;  with `seed` set, a run is repeatable event for event
+
+        arrivals:
+            drawn at random (`arrival_rate`, `arrival_profile`) or
+            replayed from a recorded trace file with `arrival_trace`,
+            see simtrace.py for the csv and binary formats
 '''
 
 import asyncio
 import random
+from array import array
+from collections import Counter, deque
+import selectors
 import time
 import yaml
 from enum import Enum
@@ -20,6 +37,18 @@ from sys import argv
 import os.path
 import logging
 import logging.config
+import sys
+
+import numpy as np
+
+from simevents import (EventSink, EVENT_TYPES, ENTITY_FLOOR, ENTITY_ELEV,
+                       DIR_NONE, DIR_UP, DIR_DOWN,
+                       EV_INIT, EV_CYCL, EV_LOAD, EV_IDLE, EV_MOVE, EV_STOP,
+                       EV_UNLD, EV_PASS, EV_RQST, EV_RQIN, EV_WAIT, EV_DONE)
+from simstats import SimStats
+from riders import RiderStore
+from simtrace import read_trace, check_trace
+from simconfig import compile_config, ConfigError, STRATEGY_OPTIONS
 
 
 class BDir(Enum):
@@ -30,13 +59,113 @@ class BDir(Enum):
     UP      = 'up' 
     DOWN    = 'down'
 
+    def __init__(self, value):
+        # direction code of the event records
+        self.code = DIR_UP if value == 'up' else DIR_DOWN
+
     def __str__(self):
         ''' shorthand for logging output '''
         if self is BDir.UP:
             return '↑'
         else:
             return '↓'
-  
+
+
+def sim_time():
+    ''' current simulation time, i.e. the running event loop's clock
+        which is real (monotonic) or virtual depending on the loop '''
+    return asyncio.get_running_loop().time()
+
+
+class VirtualClockSelector(selectors.DefaultSelector):
+    ''' selector that jumps a virtual clock forward by the timeout
+        instead of blocking for it
+        the simulation does no real I/O, so the only thing the event loop
+        would wait for is the next scheduled timer
+    '''
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+
+    def select(self, timeout=None):
+        if timeout is not None and timeout > 0:
+            self.now += timeout
+            timeout = 0
+        return super().select(timeout)
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    ''' event loop for discrete-event simulation:
+        time() reads the virtual clock, so call_later/asyncio.sleep
+        schedule on simulated time, and each idle wait advances the clock
+        straight to the next timer in the loop's priority queue
+    '''
+    def __init__(self):
+        self._vclock = VirtualClockSelector()
+        super().__init__(selector=self._vclock)
+
+    def time(self):
+        return self._vclock.now
+
+
+def take_riders(runs, nriders):
+    ''' remove nriders, first in first out, from a deque of 
+        [first, stop] runs of consecutive rider ids
+        returns the list of range()s of the ids taken '''
+    taken = []
+    while nriders > 0:
+        run = runs[0]
+        first, stop = run
+        if stop - first <= nriders:
+            runs.popleft()
+            nriders -= stop - first
+        else:
+            stop = first + nriders
+            run[0] = stop
+            nriders = 0
+        taken.append(range(first, stop))
+    return taken
+
+
+class FloorMask:
+    ''' a set of floors as the bits of one int, indexable like a list
+        of bools;  "any floor set" is O(1), the count is a popcount and
+        the next set floor up or down from a floor is found by bit
+        arithmetic '''
+    __slots__ = ('bits',)
+
+    def __init__(self):
+        self.bits = 0
+
+    def __getitem__(self, floor):
+        return (self.bits >> floor) & 1 == 1
+
+    def __setitem__(self, floor, flag):
+        if flag:
+            self.bits |= 1 << floor
+        else:
+            self.bits &= ~(1 << floor)
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def count(self):
+        return bin(self.bits).count('1')    #int.bit_count needs 3.10
+
+    def next_up(self, floor):
+        ''' lowest set floor >= floor, or None '''
+        b = self.bits >> floor
+        if not b:
+            return None
+        return floor + (b & -b).bit_length() - 1
+
+    def next_down(self, floor):
+        ''' highest set floor <= floor, or None '''
+        b = self.bits & ((2 << floor) - 1)
+        if not b:
+            return None
+        return b.bit_length() - 1
+
 
 class FloorList:
     ''' i.e. the building state
@@ -45,15 +174,20 @@ class FloorList:
         besides not looking like traditional OOP,
         each floorcoro has access to whole list ??
     '''    
-    def __init__(self, nfloors):
+    def __init__(self, nfloors, riders=None):
         self.nfloors = nfloors
+        self.narrived = 0     # riders that arrived at any floor
+        self.riders = riders if riders is not None else RiderStore()
         self.idents = [str(i + 1) for i in range(nfloors)]
-        self.nupwaiting = {i : 0 for i in range(nfloors)} 
-        self.ndownwaiting = {i : 0 for i in range(nfloors)} 
+        self.nupwaiting = array('i', [0]) * nfloors
+        self.ndownwaiting = array('i', [0]) * nfloors
+        # [first, stop] runs of the ids of the waiting riders
+        self.uparrivals = [deque() for i in range(nfloors)]
+        self.downarrivals = [deque() for i in range(nfloors)]
         
-        #upreq[2] and downreq[0] will never be used 
-        self.upreq = {i : False for i in range(nfloors)}
-        self.downreq = {i : False for i in range(nfloors)}
+        #upreq[top] and downreq[0] will never be used 
+        self.upreq = FloorMask()
+        self.downreq = FloorMask()
                   
     def istop(self, floor):
         return floor == self.nfloors - 1
@@ -61,27 +195,90 @@ class FloorList:
     def isbottom(self, floor):
         return floor == 0
         
-    def add_upwaiting(self, ifloor, nriders):
+    def nwaiting(self, ifloor, bdir):
+        if bdir == BDir.UP:
+            return self.nupwaiting[ifloor]
+        else:
+            return self.ndownwaiting[ifloor]
+
+    def add_upwaiting(self, ifloor, first, nriders):
+        ''' riders first .. first + nriders - 1 of the store '''
+        self.narrived += nriders
         self.nupwaiting[ifloor] += nriders
+        self.uparrivals[ifloor].append([first, first + nriders])
         self.upreq[ifloor] = True
 
     def dec_upwaiting(self, ifloor, nriders):
+        ''' returns the ranges of the ids of the riders taken '''
         if nriders > self.nupwaiting[ifloor]:
             raise ValueError('decrementing upwaiting more than possible')
         self.nupwaiting[ifloor] -= nriders
         if self.nupwaiting[ifloor] == 0:
             self.upreq[ifloor] = False
+        return take_riders(self.uparrivals[ifloor], nriders)
         
-    def add_downwaiting(self, ifloor, nriders):
+    def add_arrivals(self, nup, ndown, updests, downdests):
+        ''' add a batch of riders, nup and ndown are arrays of counts
+            per floor, updests and downdests the destinations of the 
+            riders, floor by floor (as from draw_destinations)
+            returns (floor, BDir, count, isnew) for each nonzero count,
+            isnew if the floor had no request pending in that direction '''
+        res = []
+        t = sim_time()
+        for counts, dests, bdir, add, reqs in (
+                (nup, updests, BDir.UP, self.add_upwaiting, self.upreq),
+                (ndown, downdests, BDir.DOWN, self.add_downwaiting, 
+                 self.downreq)):
+            floors = np.flatnonzero(counts)
+            if len(floors) == 0:
+                continue
+            nriders = counts[floors]
+            first = self.riders.add(np.repeat(floors, nriders), dests, t)
+            for ifloor, n in zip(floors.tolist(), nriders.tolist()):
+                isnew = not reqs[ifloor]
+                add(ifloor, first, n)
+                first += n
+                res.append((ifloor, bdir, n, isnew))
+        return res
+
+    def add_riders(self, ifloor, bdir, dests):
+        ''' add riders waiting at one floor, with their destinations
+            returns isnew as add_arrivals '''
+        n = len(dests)
+        first = self.riders.add(np.full(n, ifloor), dests, sim_time())
+        if bdir == BDir.UP:
+            isnew = not self.upreq[ifloor]
+            self.add_upwaiting(ifloor, first, n)
+        else:
+            isnew = not self.downreq[ifloor]
+            self.add_downwaiting(ifloor, first, n)
+        return isnew
+
+    def draw_destinations(self, nup, ndown, rng):
+        ''' a random destination for every rider of the counts, 
+            above the floor for up and below it for down
+            returns (updests, downdests), rider by rider, floor by floor '''
+        floors = np.arange(self.nfloors)
+        upfloors = np.repeat(floors, nup)
+        downfloors = np.repeat(floors, ndown)
+        return (rng.integers(upfloors + 1, self.nfloors),
+                rng.integers(0, downfloors))
+
+    def add_downwaiting(self, ifloor, first, nriders):
+        ''' riders first .. first + nriders - 1 of the store '''
+        self.narrived += nriders
         self.ndownwaiting[ifloor] += nriders
+        self.downarrivals[ifloor].append([first, first + nriders])
         self.downreq[ifloor] = True
             
     def dec_downwaiting(self, ifloor, nriders):
+        ''' returns the ranges of the ids of the riders taken '''
         if nriders > self.ndownwaiting[ifloor]:
             raise ValueError('decrementing downwaiting more than possible')
         self.ndownwaiting[ifloor] -= nriders
         if self.ndownwaiting[ifloor] == 0:
             self.downreq[ifloor] = False
+        return take_riders(self.downarrivals[ifloor], nriders)
       
     #not used TODO remove       
     def random_floor(a, b):
@@ -89,73 +286,145 @@ class FloorList:
             where which one is lower is uncertain'''
         pass  
              
-def log_data_floor(flooridx, event_type, event_amt, desc, nelevs):
-    ''' log floor data in table event and visualization formats '''
-    evt_logger = logging.getLogger('sim_events_logger')         
-    evt_logger.info('{:4.8f}, F{},{} {}{}'.format(
-               time.perf_counter(),
-               flooridx, event_type, event_amt, desc))
+_event_sink = None    # simevents.EventSink, see set_event_logging
+_vis_logger = None
+_loop_time = sim_time # time() of the running loop, bound by run_sim
+
+def set_event_logging(sink, vis=True):
+    ''' send simulation events to `sink` (None: no event log)
+        and, if vis, also to the console visualization logger '''
+    global _event_sink, _vis_logger
+    _event_sink = sink
+    _vis_logger = logging.getLogger('sim_vis_logger') if vis else None
+
+
+def log_data_floor(flooridx, event_type, event_amt, bdir, nelevs):
+    ''' log floor data in table event and visualization formats 
+        event_type is one of the simevents EV_ codes,
+        bdir is None for events without a direction '''
+    t = _loop_time()
+    if _event_sink is not None:
+        _event_sink.record(t, ENTITY_FLOOR, flooridx, event_type, event_amt,
+                           flooridx, DIR_NONE if bdir is None else bdir.code)
                
-    vis_logger = logging.getLogger('sim_vis_logger')
-    vis_logger.info('{:4.8f} {}F{},{} {} {}'.format(
-               time.perf_counter(),
+    if _vis_logger is not None:
+        _vis_logger.info('{:4.8f} {}F{},{} {} {}'.format(
+               t,
                '            ' * (nelevs + 2),
-               flooridx, event_type, event_amt, desc))        
+               flooridx, EVENT_TYPES[event_type], event_amt, bdir or ''))        
                           
     
-async def floor_proc(ifloor, floorlist, elevlist, t_count):
-    ''' coroutine to accumulate riders and send requests to elevatorlist '''
+async def arrival_proc(floorlist, elevlist, t_count, arrival_rate,
+                       tick=0.5, profile=None, rng=None):
+    ''' one coroutine for the rider arrivals at all floors:
+        every tick draws Poisson counts for all floors and directions
+        at once, adds them to the floorlist as a batch and sends 
+        requests to the elevatorlist
+        
+        arrival_rate is the mean number of new riders per second for 
+        each floor and direction, one number or a list per floor;
+        profile is an optional list of rate multipliers for equal
+        parts of the running time, e.g. [3, 1, 1, 2] for peak hours
+        rng is a numpy Generator
+    '''
+    nfloors = floorlist.nfloors
+    rate = np.broadcast_to(np.asarray(arrival_rate, dtype=float), (nfloors,))
+    # no up arrivals at the top, no down arrivals at the bottom
+    lam = np.concatenate([rate, rate]) * tick
+    lam[nfloors - 1] = 0
+    lam[nfloors] = 0
     
-    ncycles = 0
+    if rng is None:
+        rng = np.random.default_rng()
+    t_start = sim_time()
+    duration = t_count - t_start
+    nticks = 0
     
-    while time.perf_counter() < t_count:  
-        ncycles += 1
-        
-        #log status of all floors
-        
+    while sim_time() < t_count:  
+        nticks += 1
+        if profile:
+            part = int((sim_time() - t_start) / duration * len(profile))
+            counts = rng.poisson(lam * profile[min(part, len(profile) - 1)])
+        else:
+            counts = rng.poisson(lam)
         
-        #dont add up for top nor down for bottom 
-        if not floorlist.istop(ifloor):
-            inc_upw = random.randint(0,floorlist.nfloors)
-            if inc_upw > 0:
-                if not floorlist.upreq[ifloor]:
-                    floorlist.upreq[ifloor] = True
-                    elevlist.req_stop(ifloor, BDir.UP)
-                floorlist.add_upwaiting(ifloor, inc_upw)
-                log_data_floor(ifloor, 'Wait', '+' + str(inc_upw), 
-                               BDir.UP, elevlist.elev_count) 
-                    
-        if not floorlist.isbottom(ifloor):
-            inc_downw = random.randint(0,floorlist.nfloors)
-            if inc_downw > 0:
-                if not floorlist.downreq[ifloor]:
-                    floorlist.downreq[ifloor] = True
-                    elevlist.req_stop(ifloor, BDir.DOWN)
-                floorlist.add_downwaiting(ifloor, inc_downw)
-                log_data_floor(ifloor, 'Wait', '+' + str(inc_downw), 
-                               BDir.DOWN, elevlist.elev_count) 
+        nup, ndown = counts[:nfloors], counts[nfloors:]
+        updests, downdests = floorlist.draw_destinations(nup, ndown, rng)
+        for ifloor, bdir, n, isnew in floorlist.add_arrivals(
+                nup, ndown, updests, downdests):
+            if isnew:
+                elevlist.req_stop(ifloor, bdir)
+            log_data_floor(ifloor, EV_WAIT, n, bdir, elevlist.elev_count) 
                           
-        await asyncio.sleep(random.random())       # 0 < r < 1 
+        await asyncio.sleep(tick) 
+
+    for ifloor in range(nfloors):
+        log_data_floor(ifloor, EV_DONE, nticks, None, elevlist.elev_count) 
+    return True
+
+async def trace_proc(floorlist, elevlist, t_count, trace):
+    ''' replaces arrival_proc to replay recorded arrivals:
+        trace is an iterable of simtrace.TRACE_DTYPE chunks, as from
+        simtrace.read_trace, with times in seconds from the start;
+        only one chunk is in memory at a time
+    '''
+    t_start = sim_time()
+    nevents = 0
+    t_prev = None
+    for chunk in trace:
+        check_trace(chunk, floorlist.nfloors, t_prev)
+        if len(chunk):
+            t_prev = chunk['t'][-1]
+        for t, ifloor, bdir, dest, n in chunk.tolist():
+            t += t_start
+            if t >= t_count:
+                break
+            if t > sim_time():
+                await asyncio.sleep(t - sim_time())
+            nevents += 1
+            if n == 0:
+                continue
+            bdir = BDir.UP if bdir == DIR_UP else BDir.DOWN
+            if floorlist.add_riders(ifloor, bdir, np.full(n, dest)):
+                elevlist.req_stop(ifloor, bdir)
+            log_data_floor(ifloor, EV_WAIT, n, bdir, elevlist.elev_count)
 
-    log_data_floor(ifloor, 'Done', ncycles, 'cycl', elevlist.elev_count) 
-    return True  #'floor_proc f.{} done'.format(ifloor + 1, ncycles) 
+    for ifloor in range(floorlist.nfloors):
+        log_data_floor(ifloor, EV_DONE, nevents, None, elevlist.elev_count) 
+    return True
 
 class Elevator:
     
-    def __init__(self, idx, elev_config):
-        '''config is the part for the particular elevator which is a dict'''
+    def __init__(self, idx, elev_settings, stats, fleet=None):
+        '''elev_settings is the simconfig.ElevSettings of this elevator
+           stats is the run's SimStats
+           fleet is the ElevatorList, which keeps a copy of the position'''
         self.idx = idx   
-        self.ident = elev_config['name'] 
-        self.maxriders = elev_config['maxriders']    
-        self.nfloors = elev_config['floors_served']   
+        self.stats = stats
+        self.fleet = fleet
+        self.ident = elev_settings.name 
+        self.maxriders = elev_settings.maxriders    
+        self.nfloors = elev_settings.floors_served   
         self.curdir = BDir.UP
         self.curfloor = 0
         self.nriders = 0
-        self.reqs = { BDir.UP: [False for i in range(self.nfloors)], 
-                      BDir.DOWN: [False for i in range(self.nfloors)] }
+        self.ntrips = 0
+        self.nboarded = 0
+        self.ndelivered = 0
+        # ids of the riders aboard, by destination floor
+        self.aboard = [array('i') for i in range(self.nfloors)]
+        # (board time, count) of the riders aboard, by destination floor
+        self.boardings = [[] for i in range(self.nfloors)]
+        self.upreqs = FloorMask()
+        self.downreqs = FloorMask()
+        self.reqs = { BDir.UP: self.upreqs, BDir.DOWN: self.downreqs }
         # BDir.UP[nfloors - 1] and BDir.DOWN[0] will always be False
         # but it's convenient to keep the indexing consistent
         
+        # set by ElevatorList.req_stop, so an idle elevator can wait
+        # for a request instead of polling
+        self.wakeup = asyncio.Event()
+        
     def __str__(self):
         return self.ident
        
@@ -170,92 +439,229 @@ class Elevator:
             self.curdir = BDir.DOWN
         elif self.curfloor == 0:
             self.curdir = BDir.UP 
+
+        if self.fleet is not None:
+            self.fleet.update_position(self)
+
+    def update_load(self):
+        ''' after a change to the riders or the requests '''
+        if self.fleet is not None:
+            self.fleet.update_load(self)
     
     def hasanyrequest(self):
-        return any(self.reqs[BDir.UP]) or any(self.reqs[BDir.DOWN])
+        return self.upreqs.bits != 0 or self.downreqs.bits != 0
+
+    def nrequests(self):
+        ''' number of floor stops queued for this elevator '''
+        return self.upreqs.count() + self.downreqs.count()
+
+    def next_request(self):
+        ''' the next requested floor in the current direction, 
+            from the current floor on, or None '''
+        if self.curdir == BDir.UP:
+            return self.upreqs.next_up(self.curfloor)
+        else:
+            return self.downreqs.next_down(self.curfloor)
             
+    def clear_request(self):
+        ''' a stop serves the request in the current direction;
+            at the top or bottom floor it serves both directions '''
+        self.reqs[self.curdir][self.curfloor] = False
+        if self.curfloor == 0 or self.curfloor == self.nfloors - 1:
+            self.reqs[BDir.UP][self.curfloor] = False
+            self.reqs[BDir.DOWN][self.curfloor] = False
+        self.update_load()
+
     def hasrequest(self):
         if self.curdir == BDir.UP:
-            return self.reqs[BDir.UP][self.curfloor]
+            return self.upreqs[self.curfloor]
         elif self.curdir == BDir.DOWN:
-            return self.reqs[BDir.DOWN][self.curfloor]
+            return self.downreqs[self.curfloor]
         else:
             return False 
             
+    def board(self, riders, idruns, nriders):
+        ''' the riders with the ids in idruns (ranges) get on, 
+            each new destination becomes a request
+            a run of ids arrived together (RiderStore.add), so it is
+            one slice of the columns and one wait time '''
+        t = sim_time()
+        self.nriders += nriders
+        self.nboarded += nriders
+        reqs = self.reqs[self.curdir]
+        aboard = self.aboard
+        t_board = riders.t_board
+        for ids in idruns:
+            first, stop = ids.start, ids.stop
+            t_board[first:stop] = array('d', [t]) * (stop - first)
+            self.stats.add_wait(t - riders.t_arrive[first], stop - first)
+            dests = riders.dest[first:stop]
+            for rid, pick in zip(ids, dests):
+                aboard[pick].append(rid)
+            #destinations in the order the riders chose them
+            for pick, n in Counter(dests).items():
+                self.boardings[pick].append((t, n))
+                if not reqs[pick]:
+                    reqs[pick] = True
+                    log_data_req(self, EV_RQIN, pick)
+        self.update_load()
+
+    def unload(self, riders):
+        ''' the riders for the current floor get off,
+            returns their number '''
+        t = sim_time()
+        ids = self.aboard[self.curfloor]
+        nriders = len(ids)
+        if nriders == 0:
+            return 0
+        self.aboard[self.curfloor] = array('i')
+        self.nriders -= nriders
+        self.ndelivered += nriders
+        t_alight = riders.t_alight
+        for rid in ids:
+            t_alight[rid] = t
+        #one ride time for the riders of each boarding
+        for t_board, n in self.boardings[self.curfloor]:
+            self.stats.add_ride(t - t_board, n)
+        self.boardings[self.curfloor] = []
+        self.update_load()
+        return nriders
+
     def loadriders(self, floorlist):
         ''' Adjust state to reflect added riders at current floor
-            New riders request floor destination
+            the riders' destinations become floor requests
         '''     
         inc = 0
-        if self.curdir == BDir.UP:
-            if floorlist.nupwaiting[self.curfloor] > 0:
-                inc = min(self.maxriders - self.nriders, 
-                      floorlist.nupwaiting[self.curfloor])
-                self.nriders += inc 
-                floorlist.dec_upwaiting(self.curfloor, inc)              
-            #get rider requests
-            for rider in range(self.nriders):
-                pick = random.randint(self.curfloor + 1, self.nfloors - 1)
-                if not self.reqs[BDir.UP][pick]:
-                    self.reqs[BDir.UP][pick] = True
-                    log_data_req(self, 'RqIn', pick)                        
-        elif self.curdir == BDir.DOWN:
-            if floorlist.ndownwaiting[self.curfloor] > 0:
-                inc = min(self.maxriders - self.nriders, 
-                      floorlist.ndownwaiting[self.curfloor])
-                self.nriders += inc
-                floorlist.dec_downwaiting(self.curfloor, inc)                
-            #get rider requests
-            for rider in range(self.nriders):
-                pick = random.randint(0, self.curfloor - 1)
-                if not self.reqs[BDir.DOWN][pick]:
-                    self.reqs[BDir.DOWN][pick] = True
-                    log_data_req(self, 'RqIn', pick)                        
+        nwaiting = floorlist.nwaiting(self.curfloor, self.curdir)
+        if nwaiting > 0:
+            inc = min(self.maxriders - self.nriders, nwaiting)
+            if self.curdir == BDir.UP:
+                idruns = floorlist.dec_upwaiting(self.curfloor, inc)
+            else:
+                idruns = floorlist.dec_downwaiting(self.curfloor, inc)
+            self.board(floorlist.riders, idruns, inc)
         return inc              
         
 class ElevatorList:   
     '''singleton
-       to manage the group of elevators'''
+       to manage the group of elevators
+       
+       requests are assigned by a DispatchStrategy, chosen with the
+       `dispatch` config key (see STRATEGIES), by default nearest car
+       
+       the elevator positions are mirrored in numpy arrays so the
+       distances from a request to all elevators are one vectorized
+       expression, used from VECTOR_MIN_ELEVS elevators on
+       (see bench_dispatch.py for the crossover);  so are the queued
+       stops and the riders for the ETA costs, updated by the
+       elevators (update_load) whenever they change'''
+    
+    VECTOR_MIN_ELEVS = 32
     
-    def __init__(self, config):
-        self.elev_count = len(config['elevators'])
-        self.floor_count = config['floor_count']    
+    def __init__(self, settings, stats):
+        ''' settings is the run's simconfig.SimSettings '''
+        self.elev_count = settings.elev_count
+        self.floor_count = settings.floor_count    
+        self.max_dist = (self.floor_count - 1) * 2
+        self._floors = np.zeros(self.elev_count, dtype=np.int64)
+        self._up = np.ones(self.elev_count, dtype=bool)
+        self._nstops = np.zeros(self.elev_count, dtype=np.int64)
+        self._nriders = np.zeros(self.elev_count, dtype=np.int64)
+        self._maxriders = np.array([e.maxriders for e in settings.elevators],
+                                   dtype=np.int64)
         self._elevs = []
         [self._elevs.append(Elevator(i, 
-            config['elevators'][i])) for i in range(self.elev_count)]
+            settings.elevators[i], stats, self)) 
+                for i in range(self.elev_count)]
+        for e in self._elevs:
+            self.update_position(e)
+        self.strategy = make_strategy(settings)
+        self.pending = []    # requests waiting for a batch strategy
                 
     def __getitem__(self, i):
         return self._elevs[i]    
         
     def __len__(self):
-        return len(_elevs) 
+        return len(self._elevs) 
         
+    def update_position(self, elev):
+        self._floors[elev.idx] = elev.curfloor
+        self._up[elev.idx] = elev.curdir == BDir.UP
+
+    def update_load(self, elev):
+        self._nstops[elev.idx] = elev.nrequests()
+        self._nriders[elev.idx] = elev.nriders
+
     def req_stop(self, reqfloor, reqdir):
-        '''assign to one elevator'''
-        e = self._get_closest(reqfloor, reqdir)
+        '''assign to one elevator, 
+           or keep for the next `dispatch_pending` if the strategy
+           assigns in batches'''
+        if self.strategy.batch:
+            self.pending.append((reqfloor, reqdir))
+        else:
+            self.assign(self.strategy.choose(self, reqfloor, reqdir),
+                        reqfloor, reqdir)
+
+    def dispatch_pending(self):
+        ''' assign all pending requests at once '''
+        if self.pending:
+            pending, self.pending = self.pending, []
+            for e, reqfloor, reqdir in self.strategy.choose_batch(self, 
+                                                                   pending):
+                self.assign(e, reqfloor, reqdir)
+
+    def assign(self, e, reqfloor, reqdir):
         e.reqs[reqdir][reqfloor] = True 
-        log_data_elev(e, 'Rqst', '', '')
+        self.update_load(e)
+        e.wakeup.set()
+        log_data_req(e, EV_RQST, reqfloor)
         
     def _get_closest(self, reqfloor, reqdir):
         ''' used when assigning an elev to a requesting floor
-            return closest elev object
+            return closest elev object, ties are broken at random
         '''
+        if self.elev_count >= self.VECTOR_MIN_ELEVS:
+            dists = self.distances(reqfloor, reqdir)
+            ties = np.flatnonzero(dists == dists.min()).tolist()
+        else:
+            dists = [self._get_dist(e, reqfloor, reqdir, self.max_dist) 
+                     for e in self._elevs]
+            min_dist = min(dists)
+            ties = [i for i, d in enumerate(dists) if d == min_dist]
         
-        closest = self._elevs[0]  #arbitrary 
-        min_dist = (self.floor_count - 1) * 2 + 1
-        max_dist = min_dist - 1
-        
-        for e in self._elevs:
-            d = self._get_dist(e, reqfloor, reqdir, max_dist)
-            if d < min_dist:
-                min_dist = d
-                closest = e
-            elif d == min_dist:
-                closest = random.choice([e, closest])
+        if len(ties) == 1:
+            closest = self._elevs[ties[0]]
+        else:
+            closest = self._elevs[random.choice(ties)]
         #debug
-        #print('{}req= f.{}{} c= {}, d= {}'.format(
-        #       ' ' * 68, reqfloor + 1, reqdir.value, closest.ident, min_dist))        
+        #print('{}req= f.{}{} c= {}'.format(
+        #       ' ' * 68, reqfloor + 1, reqdir.value, closest.ident))        
         return closest                          
+
+    def distances(self, reqfloors, reqdirs):
+        ''' `_get_dist` for all elevators at once
+            for one request:  reqfloors an int, reqdirs a BDir, 
+                              returns an array of elev_count distances
+            for a batch:  reqfloors an int array, reqdirs a bool array 
+                          (True for BDir.UP), returns a 
+                          (requests x elevators) array of distances
+        '''
+        if isinstance(reqdirs, BDir):
+            requp = reqdirs == BDir.UP
+            r = reqfloors
+            f, up = self._floors, self._up
+        else:
+            requp = np.asarray(reqdirs, dtype=bool)[:, None]
+            r = np.asarray(reqfloors)[:, None]
+            f, up = self._floors[None, :], self._up[None, :]
+        m = self.max_dist
+        
+        behind = m - f + r
+        same_up = np.where(r >= f, r - f, behind)
+        same_down = np.where(r <= f, f - r, behind)
+        return np.where(up == requp, 
+                        np.where(up, same_up, same_down),
+                        np.where(up, m - f - r, f + r))
                 
     def _get_dist(self, elev, reqfloor, reqdir, max_dist):
         '''calculate the distance between the elev and floor'''
@@ -280,146 +686,381 @@ class ElevatorList:
                 
         return dist
 
-def log_data_elev(elev, event_type, event_amt, desc):
-    ''' log elevator data in table event and visualization formats '''
-    evt_logger = logging.getLogger('sim_events_logger')         
-    evt_logger.info('{:4.8f}, E{},{} {},F{}{}'.format(
-               time.perf_counter(),
-               elev.idx, event_type, event_amt, 
-               elev.curfloor, elev.curdir)) #, elev.nriders))
+
+class DispatchStrategy:
+    ''' how ElevatorList assigns floor requests to elevators:
+        choose() returns the elevator for one request, or for a batch 
+        strategy, choose_batch() returns (elevator, floor, dir) for 
+        each of a list of pending (floor, dir) requests
+    '''
+    batch = False
+    
+    def choose(self, elevlist, reqfloor, reqdir):
+        raise NotImplementedError
+
+    def choose_batch(self, elevlist, requests):
+        return [(self.choose(elevlist, reqfloor, reqdir), reqfloor, reqdir)
+                for reqfloor, reqdir in requests]
+
+
+class NearestCar(DispatchStrategy):
+    ''' the elevator with the shortest travel distance (`_get_dist`) '''
+    
+    def choose(self, elevlist, reqfloor, reqdir):
+        return elevlist._get_closest(reqfloor, reqdir)
+
+
+class EtaLoadPenalty(DispatchStrategy):
+    ''' the elevator with the lowest estimated time of arrival:
+            travel distance * floor_time 
+            + queued stops * stop_time
+            + load_penalty * nriders / maxriders, 
+              or full_penalty for a full elevator
+        the default times are the mean delays used in elev_proc
+    '''
+    
+    def __init__(self, floor_time=0.01, stop_time=0.25, load_penalty=1.0,
+                 full_penalty=1000.0):
+        self.floor_time = floor_time
+        self.stop_time = stop_time
+        self.load_penalty = load_penalty
+        self.full_penalty = full_penalty
+
+    def costs(self, elevlist, reqfloors, reqdirs):
+        ''' ETA for all elevators, 
+            same arguments and shape as ElevatorList.distances '''
+        nstops = elevlist._nstops
+        nriders = elevlist._nriders
+        maxriders = elevlist._maxriders
+        extra = (nstops * self.stop_time 
+                 + self.load_penalty * nriders / maxriders
+                 + np.where(nriders >= maxriders, self.full_penalty, 0.0))
+        return (elevlist.distances(reqfloors, reqdirs) * self.floor_time 
+                + extra)
+
+    def choose(self, elevlist, reqfloor, reqdir):
+        return elevlist[int(np.argmin(self.costs(elevlist, reqfloor, reqdir)))]
+
+
+class BatchMatching(EtaLoadPenalty):
+    ''' requests are collected and assigned every `tick` seconds 
+        by a min-cost matching of requests to elevators on ETA cost,
+        at most one new request per elevator per matching round '''
+    batch = True
+    
+    def __init__(self, tick=0.1, **kwargs):
+        super().__init__(**kwargs)
+        self.tick = tick
+
+    def choose_batch(self, elevlist, requests):
+        floors = np.array([r[0] for r in requests])
+        ups = np.array([r[1] == BDir.UP for r in requests])
+        cost = self.costs(elevlist, floors, ups)
+        
+        res = []
+        n = elevlist.elev_count
+        for start in range(0, len(requests), n):
+            rows = range(start, min(start + n, len(requests)))
+            cols = min_cost_assignment(cost[start:start + n])
+            for k, col in zip(rows, cols):
+                res.append((elevlist[col], requests[k][0], requests[k][1]))
+        return res
+
+
+def min_cost_assignment(cost):
+    ''' Hungarian algorithm for a (rows x cols) cost array, rows <= cols
+        returns the column assigned to each row, minimizing the total '''
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)      # row matched to column j, 1-based
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(masked)) + 1
+            delta = masked[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    res = [0] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            res[p[j] - 1] = j - 1
+    return res
+
+
+#the classes of the strategies of simconfig.STRATEGY_OPTIONS
+STRATEGIES = {'nearest' : NearestCar,
+              'eta'     : EtaLoadPenalty,
+              'batch'   : BatchMatching}
+
+def make_strategy(settings):
+    ''' the DispatchStrategy named by `dispatch` in the settings,
+        with the options from `dispatch_options` '''
+    name = settings.dispatch
+    if name not in STRATEGY_OPTIONS:
+        raise ValueError('unknown dispatch strategy: {}'.format(name))
+    return STRATEGIES[name](**dict(settings.dispatch_options))
+
+
+async def dispatch_proc(elevlist, t_count):
+    ''' coroutine for batch strategies:  assigns the pending requests
+        every strategy.tick seconds '''
+    tick = elevlist.strategy.tick
+    while sim_time() < t_count:
+        await asyncio.sleep(tick)
+        elevlist.dispatch_pending()
+    return True
+
+
+def log_data_elev(elev, event_type, event_amt):
+    ''' log elevator data in table event and visualization formats 
+        event_type is one of the simevents EV_ codes '''
+    t = _loop_time()
+    if _event_sink is not None:
+        _event_sink.record(t, ENTITY_ELEV, elev.idx, event_type, event_amt,
+                           elev.curfloor, elev.curdir.code)
                
-    vis_logger = logging.getLogger('sim_vis_logger')
-    vis_logger.info('{:4.8f} {}E{},{} {},F{}{}'.format(
-               time.perf_counter(),
+    if _vis_logger is not None:
+        _vis_logger.info('{:4.8f} {}E{},{} {},F{}{}'.format(
+               t,
                '             ' * (elev.idx),
-               elev.idx, event_type, event_amt, 
+               elev.idx, EVENT_TYPES[event_type], event_amt, 
                elev.curfloor, elev.curdir))          
 
 def log_data_req(elev, event_type, floor_dest):
     ''' log elevator request data in table event and visualization formats 
         `log_data_elev` records current floor, but request needs destination
     '''
-    evt_logger = logging.getLogger('sim_events_logger')         
-    evt_logger.info('{:4.8f}, E{},{} F{}'.format(
-               time.perf_counter(),
-               elev.idx, event_type, floor_dest))
+    t = _loop_time()
+    if _event_sink is not None:
+        _event_sink.record(t, ENTITY_ELEV, elev.idx, event_type, 0,
+                           floor_dest, elev.curdir.code)
                
-    vis_logger = logging.getLogger('sim_vis_logger')
-    vis_logger.info('{:4.8f} {}E{},{} F{}'.format(
-               time.perf_counter(),
+    if _vis_logger is not None:
+        _vis_logger.info('{:4.8f} {}E{},{} F{}'.format(
+               t,
                '             ' * (elev.idx),
-               elev.idx, event_type, floor_dest))         
+               elev.idx, EVENT_TYPES[event_type], floor_dest))         
+
+
+async def wait_for_request(elev, t_count):
+    ''' idle, without polling, until `req_stop` assigns a request
+        to this elevator or the end time is reached
+        returns False if the run ended while waiting '''
+    t_idle = sim_time()
+    try:
+        while not elev.hasanyrequest():
+            log_data_elev(elev, EV_IDLE, elev.nriders)
+            elev.wakeup.clear()
+            try:
+                await asyncio.wait_for(elev.wakeup.wait(), t_count - sim_time())
+            except asyncio.TimeoutError:
+                return False
+        return True
+    finally:
+        elev.stats.add_idle(elev.idx, min(sim_time(), t_count) - t_idle)
 
     
 async def elev_proc(elev, floorlist, t_count):
     ''' coroutine for each elevator with a loop for each floor
         to floor move '''
-    evt_logger = logging.getLogger('sim_events_logger')         
-    log_data_elev(elev, 'Init', 0, '')
-    log_data_elev(elev, 'Cycl', 0, '')
+    log_data_elev(elev, EV_INIT, 0)
+    log_data_elev(elev, EV_CYCL, 0)
     
     #initial load;  otherwise only loads after a stop
     inc_riders = elev.loadriders(floorlist)
-    log_data_elev(elev, 'Load', inc_riders, '')
+    log_data_elev(elev, EV_LOAD, inc_riders)
     
-    while not elev.hasanyrequest():
-        log_data_elev(elev, 'Poll', elev.nriders, '')
-        await asyncio.sleep(0.05)  # poll for request
-        if time.perf_counter() >= t_count:
-            break;
-        
-    ntrips = 0
-    
-    while time.perf_counter() < t_count:
+    while sim_time() < t_count:
         
         nunloaded = 0
         
+        # wait for request
+        if elev.nriders == 0 and not await wait_for_request(elev, t_count):
+            break
+        
         #move
-        log_data_elev(elev, 'Move', elev.nriders, '')
+        log_data_elev(elev, EV_MOVE, elev.nriders)
+        elev.stats.add_load(elev.idx, elev.nriders / elev.maxriders)
         #due to async, the waiting rider counts shown here are not always up to date        
         #       floorlist.nupwaiting[0], floorlist.ndownwaiting[0],
         #       floorlist.nupwaiting[1], floorlist.ndownwaiting[1],
         #       floorlist.nupwaiting[2], floorlist.ndownwaiting[2]))
- 
-        # poll for request
-        while not elev.hasanyrequest() and elev.nriders == 0:
-            log_data_elev(elev, 'Poll', elev.nriders, '')
-            await asyncio.sleep(0.2) 
-            #need to check for endtime so doesn't hang  
-            if time.perf_counter() >= t_count:
-                break;
 
         #stop at or pass floor
         elev.moved()
         if elev.hasrequest() or floorlist.istop(elev.curfloor) or \
                                 floorlist.isbottom(elev.curfloor):
-            log_data_elev(elev, 'Stop', elev.nriders, '')
+            log_data_elev(elev, EV_STOP, elev.nriders)
+            elev.clear_request()
             await asyncio.sleep(random.randint(1, 4) / 10)
 
-            #unload - these unloaded riders disappear from the sim
+            #unload - riders for this floor leave the sim
             if elev.nriders > 0:
-                if floorlist.istop(elev.curfloor) or \
-                   floorlist.isbottom(elev.curfloor):
-                    nunloaded = elev.nriders
-                    elev.nriders = 0
-                else: 
-                    nunloaded = random.randint(0, elev.nriders)   
-                    elev.nriders -= nunloaded
-                log_data_elev(elev, 'Unld', nunloaded, '')
+                nunloaded = elev.unload(floorlist.riders)
+                log_data_elev(elev, EV_UNLD, nunloaded)
             #load    
             inc_riders = elev.loadriders(floorlist)
-            log_data_elev(elev, 'Load', inc_riders, '')
+            log_data_elev(elev, EV_LOAD, inc_riders)
+            #full: keep the request to come back for those left waiting
+            if floorlist.nwaiting(elev.curfloor, elev.curdir) > 0:
+                elev.reqs[elev.curdir][elev.curfloor] = True
+                elev.update_load()
        
         else:
-            log_data_elev(elev, 'Pass', 0, '')
+            log_data_elev(elev, EV_PASS, 0)
             await asyncio.sleep(0.01)
             
         if (elev.curfloor == 0):
-            ntrips += 1
-            log_data_elev(elev, 'Cycl', ntrips, '')
+            elev.ntrips += 1
+            elev.stats.add_trip(elev.idx)
+            log_data_elev(elev, EV_CYCL, elev.ntrips)
     
             
-    log_data_elev(elev, 'Done', elev.nriders, '')      
-    return True  #'elev_proc {} done with {} trips'.format(elev.ident, ntrips) 
+    log_data_elev(elev, EV_DONE, elev.nriders)      
+    return True  #'elev_proc {} done with {} trips'.format(elev.ident, elev.ntrips) 
     
 
-async def elev_controller(starttime, sim_cfg):
+async def elev_controller(starttime, settings):
     ''' takes requests and assigns each to an elevator as state      
+        settings is the run's simconfig.SimSettings
+        returns the run's SimStats, with the counts from `summarize`
     '''   
     
-    endtime = starttime + sim_cfg['running_time']
+    endtime = starttime + settings.running_time
+    arrival_rate = settings.arrival_rate
+    if arrival_rate is None:
+        arrival_rate = settings.floor_count
 
-    floorlist = FloorList(sim_cfg['floor_count'])
-    elevlist = ElevatorList(sim_cfg)
-    elev_count = len(sim_cfg['elevators'])
+    elev_count = settings.elev_count
+    stats = SimStats(elev_count)
+    floorlist = FloorList(settings.floor_count)
+    elevlist = ElevatorList(settings, stats)
     
-    floor_coros = [floor_proc(i, floorlist, elevlist, endtime) 
-                  for i in range(sim_cfg['floor_count'])]
+    if settings.arrival_trace:
+        arrival_coro = trace_proc(floorlist, elevlist, endtime, 
+                                  read_trace(settings.arrival_trace, 
+                                             t_max=settings.running_time))
+    else:
+        rng = np.random.default_rng(settings.seed)
+        arrival_coro = arrival_proc(floorlist, elevlist, endtime, 
+                                    arrival_rate, settings.arrival_tick,
+                                    settings.arrival_profile, rng)
     #TODO change signature to match above: i, elevlist, ...
     elev_coros = [elev_proc(elevlist[i], floorlist, endtime) 
                   for i in range(elev_count)] 
+    if elevlist.strategy.batch:
+        elev_coros.append(dispatch_proc(elevlist, endtime))
      
     app_logger = logging.getLogger('app_logger')
     app_logger.info('    simulation events:')     
                  
-    elev_res = await asyncio.gather(*elev_coros, *floor_coros)
+    await asyncio.gather(*elev_coros, arrival_coro)
     
-    return elev_res
+    stats.t_elapsed = sim_time() - starttime
+    stats.counts = summarize(floorlist, elevlist, stats.t_elapsed)
+    return stats
+
+
+def summarize(floorlist, elevlist, t_elapsed):
+    ''' summary counts for a finished run as a flat dict,
+        i.e. one row of a table of runs '''
+    elevs = [elevlist[i] for i in range(elevlist.elev_count)]
+    ndelivered = sum(e.ndelivered for e in elevs)
+    return {
+        'sim_time'          : t_elapsed,
+        'arrived'           : floorlist.narrived,
+        'boarded'           : sum(e.nboarded for e in elevs),
+        'delivered'         : ndelivered,
+        'still_waiting'     : sum(floorlist.nupwaiting) + 
+                              sum(floorlist.ndownwaiting),
+        'still_riding'      : sum(e.nriders for e in elevs),
+        'trips'             : sum(e.ntrips for e in elevs),
+        'delivered_per_min' : 60 * ndelivered / t_elapsed if t_elapsed else 0,
+    }
+
+
+def _cancel_tasks(event_loop):
+    ''' after a failed run, e.g. a bad trace record, the elevator
+        coroutines are still waiting:  cancel them and let them finish,
+        as asyncio.run does '''
+    tasks = asyncio.all_tasks(event_loop)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        event_loop.run_until_complete(
+            asyncio.gather(*tasks, return_exceptions=True))
+
+
+def run_sim(sim_cfg):
+    ''' run one simulation to completion on its own event loop
+        and return the summary dict of the SimStats from 
+        `elev_controller`, with the elapsed wall time added
+        sim_cfg is a config dict or its SimSettings (compile_config),
+        raises ConfigError for an invalid config
+        
+        logging is left as configured by the caller, 
+        i.e. `main` or a sweep worker
+    '''
+    global _loop_time
+    settings = compile_config(sim_cfg)
+    if settings.seed is not None:
+        random.seed(settings.seed)
+
+    if settings.virtual_time:
+        event_loop = VirtualTimeEventLoop()
+    else:
+        event_loop = asyncio.new_event_loop()
+    _loop_time = event_loop.time    #for the event logging
+
+    t_wall = time.perf_counter()
+    try:
+        t0 = event_loop.time()
+        stats = event_loop.run_until_complete(elev_controller(t0, settings))
+    finally:
+        _cancel_tasks(event_loop)
+        event_loop.close()
+    summary = stats.summary()
+    summary['wall_time'] = time.perf_counter() - t_wall
+    return summary
 
 
 def main(sim_cfg):
     ''' TODO:
-             alternate way to wait for request, e.g. queue
-             Config validation
-             summary stats: trip and cycle durations, rider counts, etc.
              replace top(n) with gettop()
              replace hasreq() with hasreq(fl,dir)  ??
              review event duration times used in asyncio.sleep
              reassess access to config by various (moving) parts
-             config option to adjust floor new rider frequency
              enable elevator.floors_served to differ from floor_count
              
              '''
+
+    #config, before anything is set up
+    try:
+        settings = compile_config(sim_cfg)
+    except ConfigError as e:
+        print(e)
+        sys.exit(-1)
              
     #logging
     log_cfg_path = 'logging.cfg'
@@ -440,19 +1081,21 @@ def main(sim_cfg):
     evt_logger.info('sim initialized')
     
     
-    #TODO this can raise exeption if value not present - config schema val will fix
-    app_logger.info('Main\ttotal simulation time to run: {}'.format(sim_cfg['running_time']))
+    app_logger.info('Main\ttotal simulation time to run: {}'.format(settings.running_time))
              
-    t0 = time.perf_counter()   
-    app_logger.info('Main\tstart time: {:3.4f}'.format(t0))  
-    
-    event_loop = asyncio.get_event_loop()
+    app_logger.info('Main\trandom seed: {}'.format(settings.seed))
+    app_logger.info('Main\tclock: {}'.format(
+        'virtual' if settings.virtual_time else 'real'))
+
+    sink = EventSink(logging.getLogger('sim_events_logger').handlers)
+    set_event_logging(sink, vis=settings.visualize)
     try:
-        result = event_loop.run_until_complete(elev_controller(t0, sim_cfg))
-        #app_logger.info('result: {!r}'.format(result))
+        summary = run_sim(settings)
     finally:
-        event_loop.close()
-    app_logger.info('total time: {:3.4f}'.format(time.perf_counter() - t0))    
+        sink.close()
+
+    for key, value in summary.items():
+        app_logger.info('Main\t{}: {}'.format(key, value))
     
     app_logger.info("simulation ended") 
     
@@ -466,6 +1109,14 @@ version : 0.2
 
 running_time : 1.2
 floor_count : 4
+#seed : 1234             # repeatable runs
+#virtual_time : yes      # simulated clock, no wall time spent in delays
+#arrival_rate : 4        # new riders per second per floor and direction
+#arrival_tick : 0.5      # seconds between batches of arrivals
+#arrival_profile : [3, 1, 1, 2]   # rate multipliers over the running time
+#visualize : no          # no console visualization of the events
+#dispatch : eta          # nearest (default), eta or batch
+#arrival_trace : peak.csv  # replay recorded arrivals (see simtrace.py)
 elevator_maxriders : 10
 
 elevators:
@@ -495,5 +1146,5 @@ if __name__ == "__main__":
         except OSError as e:  
             print(e)      
     else:    
-        main(yaml.load(DEFAULT_SIM_CONFIG))
+        main(yaml.safe_load(DEFAULT_SIM_CONFIG))
  
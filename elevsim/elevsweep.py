@@ -0,0 +1,148 @@
+'''
+        batch (Monte Carlo) runs of the elevator simulation
+
+        a sweep config gives a parameter grid and a list of seeds;
+        every combination is one `elevsim3.run_sim` call, fanned out
+        over a process pool, and the summary dict of each run becomes
+        one row of the result table (csv)
+
+        the runs always use the virtual clock, and the workers do not
+        load `logging.cfg` nor record sim events, so concurrent runs
+        never share a log file
+
+        usage:  python elevsweep.py [sweep.yml [results.csv]]
+'''
+
+import csv
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sys import argv
+
+import yaml
+
+from elevsim3 import run_sim, set_event_logging
+from simconfig import compile_config
+
+
+GRID_KEYS = ('floor_count', 'elevators', 'maxriders', 'arrival_rate',
+             'dispatch')
+# grid keys that may be left out of the sweep config
+GRID_DEFAULTS = {'dispatch' : ['nearest']}
+
+
+def make_sim_config(running_time, floor_count, elevators, maxriders,
+                    arrival_rate, dispatch, seed):
+    ''' build an elevsim3 config dict for one point of the grid;
+        `elevators` is the number of identical elevators '''
+    return {
+        'running_time' : running_time,
+        'floor_count'  : floor_count,
+        'arrival_rate' : arrival_rate,
+        'dispatch'     : dispatch,
+        'seed'         : seed,
+        'virtual_time' : True,
+        'elevators'    : [{'name'          : 'elev.{}'.format(i + 1),
+                           'floors_served' : floor_count,
+                           'maxriders'     : maxriders}
+                          for i in range(elevators)],
+    }
+
+
+def grid_points(grid, seeds):
+    ''' every combination of the grid values and the seeds,
+        as dicts of the GRID_KEYS plus `seed`
+        raises ValueError for a key that is not one of the GRID_KEYS,
+        or for a missing key that has no default '''
+    for key in grid:
+        if key not in GRID_KEYS:
+            raise ValueError('unknown grid key {!r}, expected one of {}'
+                             .format(key, ', '.join(GRID_KEYS)))
+    for key in GRID_KEYS:
+        if key not in grid and key not in GRID_DEFAULTS:
+            raise ValueError('grid key {!r} is missing'.format(key))
+    values = [grid[key] if key in grid else GRID_DEFAULTS[key]
+              for key in GRID_KEYS]
+    for combo in itertools.product(*values, seeds):
+        yield dict(zip(GRID_KEYS + ('seed',), combo))
+
+
+def _init_worker():
+    ''' keep the per-event sim logging out of the workers,
+        nothing is written to the files named in logging.cfg '''
+    set_event_logging(None, vis=False)
+
+
+def run_point(point, settings):
+    ''' worker:  one simulation run, returns its row for the table '''
+    row = dict(point)
+    row.update(run_sim(settings))
+    return row
+
+
+def sweep(grid, seeds, running_time, max_workers=None):
+    ''' run all grid points for all seeds in parallel
+        and return the rows in grid order
+        max_workers defaults to all cores
+        all configs are validated first, so a bad grid value raises
+        simconfig.ConfigError before any run starts '''
+    points = list(grid_points(grid, seeds))
+    settings = [compile_config(make_sim_config(running_time, **point))
+                for point in points]
+    workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker) as executor:
+        rows = list(executor.map(run_point, points, settings))
+    return rows
+
+
+def write_table(rows, f_out):
+    ''' write the result rows as csv '''
+    writer = csv.DictWriter(f_out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main(sweep_cfg, out_path=None):
+    t0 = time.perf_counter()
+    rows = sweep(sweep_cfg['grid'], sweep_cfg['seeds'],
+                 sweep_cfg['running_time'], sweep_cfg.get('max_workers'))
+    if out_path:
+        with open(out_path, 'w', newline='') as f_out:
+            write_table(rows, f_out)
+    else:
+        write_table(rows, sys.stdout)
+    print('{} runs in {:3.4f}s'.format(len(rows), time.perf_counter() - t0),
+          file=sys.stderr)
+
+
+DEFAULT_SWEEP_CONFIG = \
+'''
+---
+#default elevsweep config.yml
+running_time : 600       # simulated seconds per run
+#max_workers : 4         # default: all cores
+
+grid:
+  floor_count  : [4, 8]
+  elevators    : [2, 3]
+  maxriders    : [10]
+  arrival_rate : [2, 4]
+  dispatch     : [nearest, eta, batch]
+
+seeds : [1, 2, 3]
+'''
+
+if __name__ == "__main__":
+    if len(argv) >= 2:
+        try:
+            with open(argv[1]) as f_sweep_config:
+                sweep_cfg = yaml.safe_load(f_sweep_config)
+        except OSError as e:
+            print(e)
+        else:
+            main(sweep_cfg, argv[2] if len(argv) == 3 else None)
+    else:
+        main(yaml.safe_load(DEFAULT_SWEEP_CONFIG))
@@ -0,0 +1,50 @@
+'''
+        rider store for elevsim
+
+        every rider of a run is one index into a set of columns
+        (struct of arrays) instead of a Python object:
+            origin, dest                floors
+            t_arrive, t_board, t_alight simulation times, nan until then
+        riders arriving together get consecutive ids, so queues of
+        waiting riders can hold [first, stop) runs of ids
+'''
+
+from array import array
+
+import numpy as np
+
+
+class RiderStore:
+
+    def __init__(self):
+        self.origin = array('i')
+        self.dest = array('i')
+        self.t_arrive = array('d')
+        self.t_board = array('d')
+        self.t_alight = array('d')
+
+    def __len__(self):
+        return len(self.origin)
+
+    def add(self, origins, dests, t):
+        ''' add riders arriving at time t, origins and dests are
+            int arrays of the same length
+            returns the id of the first one, the others follow '''
+        first = len(self.origin)
+        n = len(origins)
+        self.origin.frombytes(np.asarray(origins, dtype=np.intc).tobytes())
+        self.dest.frombytes(np.asarray(dests, dtype=np.intc).tobytes())
+        self.t_arrive.frombytes(np.full(n, t).tobytes())
+        unknown = np.full(n, np.nan).tobytes()
+        self.t_board.frombytes(unknown)
+        self.t_alight.frombytes(unknown)
+        return first
+
+    def columns(self):
+        ''' dict of numpy arrays over the columns (no copies),
+            e.g. for wait times:  c['t_board'] - c['t_arrive'] '''
+        return {'origin'   : np.frombuffer(self.origin, dtype=np.intc),
+                'dest'     : np.frombuffer(self.dest, dtype=np.intc),
+                't_arrive' : np.frombuffer(self.t_arrive),
+                't_board'  : np.frombuffer(self.t_board),
+                't_alight' : np.frombuffer(self.t_alight)}
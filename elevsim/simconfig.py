@@ -0,0 +1,132 @@
+'''
+        elevsim config validation and settings
+
+        a config (the dict from the yaml file) is checked against
+        `elevsim_schema.yml` with the validator and error messages of
+        yaml_schema/bysv.py (compiled once per process, by bysv), and
+        then turned into a frozen
+        `SimSettings` that the simulation reads instead of the dict;
+        a bad config raises ConfigError, listing all its errors,
+        before the event loop starts
+'''
+
+import functools
+import importlib.util
+import os.path
+import sys
+from dataclasses import dataclass
+
+_here = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = os.path.join(_here, 'elevsim_schema.yml')
+BYSV_PATH = os.path.join(_here, os.pardir, 'yaml_schema', 'bysv.py')
+
+# the dispatch strategies of elevsim3 and the dispatch_options each
+# takes, i.e. the named arguments of its __init__ (see test_elevsim)
+STRATEGY_OPTIONS = {
+    'nearest' : (),
+    'eta'     : ('floor_time', 'stop_time', 'load_penalty', 'full_penalty'),
+    'batch'   : ('floor_time', 'stop_time', 'load_penalty', 'full_penalty',
+                 'tick'),
+}
+
+
+class ConfigError(ValueError):
+    ''' invalid elevsim config, the message has one line per error '''
+
+
+@dataclass(frozen=True)
+class ElevSettings:
+    name: str
+    floors_served: int
+    maxriders: int
+    loc: str = None
+
+
+@dataclass(frozen=True)
+class SimSettings:
+    running_time: float
+    floor_count: int
+    elevators: tuple                # of ElevSettings
+    seed: int = None
+    virtual_time: bool = False
+    arrival_rate: object = None     # number or tuple, one rate per floor
+    arrival_tick: float = 0.5
+    arrival_profile: tuple = None
+    arrival_trace: str = None
+    visualize: bool = True
+    dispatch: str = 'nearest'
+    dispatch_options: tuple = ()    # (name, value) pairs
+    version: object = None
+    elevator_maxriders: int = None
+
+    @property
+    def elev_count(self):
+        return len(self.elevators)
+
+
+def _dispatch_errors(config):
+    name = config.get('dispatch', 'nearest')
+    if name not in STRATEGY_OPTIONS:
+        return ['dispatch: unknown strategy {}'.format(name)]
+    allowed = STRATEGY_OPTIONS[name]
+    return ['dispatch_options/{}: not an option of {} dispatch{}'.format(
+                option, name, 
+                ' ({})'.format(', '.join(sorted(allowed))) if allowed else '')
+            for option in sorted(config.get('dispatch_options', {}))
+            if option not in allowed]
+
+
+@functools.lru_cache(maxsize=None)
+def _bysv():
+    ''' yaml_schema/bysv.py, which is neither a package nor on
+        sys.path, loaded from its file on first use '''
+    if 'bysv' in sys.modules:
+        return sys.modules['bysv']
+    spec = importlib.util.spec_from_file_location('bysv', BYSV_PATH)
+    bysv = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bysv)
+    return bysv
+
+
+@functools.lru_cache(maxsize=None)
+def load_schema(schema_path=SCHEMA_PATH):
+    with open(schema_path) as f_schema:
+        return _bysv().load_yaml(f_schema)
+
+
+def config_errors(config, schema_path=SCHEMA_PATH):
+    ''' list of error lines, empty for a valid config '''
+    bysv = _bysv()
+    errors = bysv.config_errors(bysv.get_validator(load_schema(schema_path)),
+                                config)
+    if errors:
+        return errors
+    # what the schema cannot express
+    nfloors = config['floor_count']
+    for i, elev in enumerate(config['elevators']):
+        if elev['floors_served'] != nfloors:
+            errors.append('elevators/{}/floors_served: must equal '
+                          'floor_count {}'.format(i, nfloors))
+    rate = config.get('arrival_rate')
+    if isinstance(rate, list) and len(rate) != nfloors:
+        errors.append('arrival_rate: {} rates for {} floors'.format(
+                      len(rate), nfloors))
+    return errors + _dispatch_errors(config)
+
+
+def compile_config(config, schema_path=SCHEMA_PATH):
+    ''' validate a config dict and return its SimSettings,
+        raises ConfigError '''
+    if isinstance(config, SimSettings):
+        return config
+    errors = config_errors(config, schema_path)
+    if errors:
+        raise ConfigError('invalid elevsim config:\n  ' + '\n  '.join(errors))
+    values = dict(config)
+    values['elevators'] = tuple(ElevSettings(**e) for e in config['elevators'])
+    for key in ('arrival_rate', 'arrival_profile'):
+        if isinstance(values.get(key), list):
+            values[key] = tuple(values[key])
+    values['dispatch_options'] = tuple(sorted(
+                                     config.get('dispatch_options', {}).items()))
+    return SimSettings(**values)
@@ -0,0 +1,227 @@
+'''
+        simulation event sink for elevsim
+
+        events are recorded into preallocated column buffers
+        (array.array, one per field) instead of being formatted and
+        written one at a time;  a full buffer is handed over to a
+        background `QueueListener` thread, which formats the whole
+        chunk and passes it to the regular logging handlers, e.g. the
+        `file_sim_events` FileHandler from logging.cfg
+
+        binary output:  `BinaryEventHandler` writes the chunks as
+        fixed-width records (EVENT_DTYPE) instead of text, and
+        `read_events` memory-maps such a file as one array per column
+
+        columns:
+            t       simulation time
+            kind    ENTITY_FLOOR or ENTITY_ELEV
+            ident   floor or elevator index
+            etype   index into EVENT_TYPES
+            amount  event amount, e.g. riders loaded, trips
+            floor   floor of the event (destination for RqIn)
+            bdir    DIR_NONE, DIR_UP or DIR_DOWN
+'''
+
+import logging
+import logging.handlers
+import queue
+import struct
+from array import array
+
+import numpy as np
+
+
+EVENT_TYPES = ('Init', 'Cycl', 'Load', 'Idle', 'Move', 'Stop', 'Unld',
+               'Pass', 'Rqst', 'RqIn', 'Wait', 'Done')
+EVENT_CODES = {name: i for i, name in enumerate(EVENT_TYPES)}
+# the codes as constants, for the callers of EventSink.record
+(EV_INIT, EV_CYCL, EV_LOAD, EV_IDLE, EV_MOVE, EV_STOP, EV_UNLD,
+ EV_PASS, EV_RQST, EV_RQIN, EV_WAIT, EV_DONE) = range(len(EVENT_TYPES))
+
+ENTITY_FLOOR = 0
+ENTITY_ELEV  = 1
+ENTITY_CHARS = ('F', 'E')
+
+DIR_NONE = 0
+DIR_UP   = 1
+DIR_DOWN = 2
+DIR_CHARS = ('', '↑', '↓')
+
+# (name, array typecode) in record order
+COLUMNS = (('t',      'd'),
+           ('kind',   'b'),
+           ('ident',  'i'),
+           ('etype',  'b'),
+           ('amount', 'i'),
+           ('floor',  'i'),
+           ('bdir',   'b'))
+
+# binary record layout, packed little-endian
+EVENT_DTYPE = np.dtype([('t',      '<f8'),
+                        ('kind',   'i1'),
+                        ('ident',  '<i4'),
+                        ('etype',  'i1'),
+                        ('amount', '<i4'),
+                        ('floor',  '<i4'),
+                        ('bdir',   'i1')])
+
+# file header: magic, format version, record size
+BIN_MAGIC = b'ELEVEVTS'
+BIN_VERSION = 1
+BIN_HEADER = struct.Struct('<8sII')
+
+
+def format_events(cols, n):
+    ''' text lines for the first n events of a chunk of columns '''
+    t, kind, ident, etype, amount, floor, bdir = cols
+    return '\n'.join(
+        '{:4.8f}, {}{},{} {},F{}{}'.format(
+            t[i], ENTITY_CHARS[kind[i]], ident[i], EVENT_TYPES[etype[i]],
+            amount[i], floor[i], DIR_CHARS[bdir[i]])
+        for i in range(n))
+
+
+class EventChunk:
+    ''' message of the records the listener passes to the handlers:
+        text handlers get the formatted lines through str(),
+        BinaryEventHandler uses the columns directly '''
+
+    def __init__(self, cols, n):
+        self.cols = cols
+        self.n = n
+
+    def __str__(self):
+        return format_events(self.cols, self.n)
+
+
+class EventListener(logging.handlers.QueueListener):
+    ''' background thread that passes each chunk of event columns
+        to the handlers, then recycles the buffers '''
+
+    def __init__(self, chunks, free, *handlers):
+        super().__init__(chunks, *handlers)
+        self._free = free
+
+    def handle(self, record):
+        super().handle(record)
+        self._free.put(record.msg.cols)
+
+
+class BinaryEventHandler(logging.Handler):
+    ''' writes event chunks as EVENT_DTYPE records after a short header,
+        use it in logging.cfg in place of the `file_sim_events` handler
+        other (text) records sent to the logger are skipped
+        the file is only created with the first chunk:  dictConfig
+        builds every handler of the config, used or not, and an unused
+        one must not truncate the file of an earlier run '''
+
+    def __init__(self, filename):
+        super().__init__()
+        self.filename = filename
+        self._f = None
+
+    def emit(self, record):
+        if not isinstance(record.msg, EventChunk):
+            return
+        if self._f is None:
+            self._f = open(self.filename, 'wb')
+            self._f.write(BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION,
+                                          EVENT_DTYPE.itemsize))
+        cols, n = record.msg.cols, record.msg.n
+        recs = np.empty(n, dtype=EVENT_DTYPE)
+        for (name, code), col in zip(COLUMNS, cols):
+            recs[name] = np.frombuffer(col, dtype=code, count=n)
+        recs.tofile(self._f)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._f is not None and not self._f.closed:
+                self._f.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.acquire()
+        try:
+            if self._f is not None:
+                self._f.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def read_events(filename):
+    ''' memory-map a binary event file,
+        returns a dict of column name: array (views into the mapping),
+        e.g. read_events(path)['t'] for all the event times '''
+    with open(filename, 'rb') as f:
+        header = f.read(BIN_HEADER.size)
+    if len(header) < BIN_HEADER.size:
+        raise ValueError('{}: not an elevsim binary event file'.format(filename))
+    magic, version, itemsize = BIN_HEADER.unpack(header)
+    if magic != BIN_MAGIC or itemsize != EVENT_DTYPE.itemsize:
+        raise ValueError('{}: not an elevsim binary event file'.format(filename))
+    if version != BIN_VERSION:
+        raise ValueError('{}: unsupported event file version {}'.format(
+                         filename, version))
+    recs = np.memmap(filename, dtype=EVENT_DTYPE, mode='r',
+                     offset=BIN_HEADER.size)
+    return {name: recs[name] for name in EVENT_DTYPE.names}
+
+
+class EventSink:
+    ''' columnar event buffer with bulk, off-thread writes
+
+        record() only stores seven values in the current buffers;
+        when they are full, or on flush(), they are queued for the
+        listener thread and the next free set of buffers is used
+    '''
+
+    def __init__(self, handlers, capacity=1 << 16, nbuffers=3):
+        self.capacity = capacity
+        self._chunks = queue.SimpleQueue()
+        self._free = queue.SimpleQueue()
+        for i in range(nbuffers - 1):
+            self._free.put(self._new_columns())
+        self._cols = self._new_columns()
+        self._n = 0
+        self._listener = EventListener(self._chunks, self._free, *handlers)
+        self._listener.start()
+
+    def _new_columns(self):
+        return tuple(array(code, [0]) * self.capacity
+                     for name, code in COLUMNS)
+
+    def record(self, t, kind, ident, etype, amount, floor, bdir):
+        i = self._n
+        cols = self._cols
+        cols[0][i] = t
+        cols[1][i] = kind
+        cols[2][i] = ident
+        cols[3][i] = etype
+        cols[4][i] = amount
+        cols[5][i] = floor
+        cols[6][i] = bdir
+        i += 1
+        self._n = i
+        if i == self.capacity:
+            self.flush()
+
+    def flush(self):
+        ''' hand the recorded events to the listener thread '''
+        if self._n == 0:
+            return
+        self._chunks.put(logging.makeLogRecord(
+            {'msg': EventChunk(self._cols, self._n), 'levelno': logging.INFO,
+             'levelname': 'INFO', 'name': 'sim_events'}))
+        try:
+            self._cols = self._free.get_nowait()
+        except queue.Empty:
+            self._cols = self._new_columns()
+        self._n = 0
+
+    def close(self):
+        ''' flush the remaining events and wait for them to be written '''
+        self.flush()
+        self._listener.stop()
@@ -0,0 +1,159 @@
+'''
+        summary statistics for elevsim, accumulated while the
+        simulation runs, so there is no second pass over the event log
+
+        every metric takes bounded memory, independent of the rider count:
+            RunningStats   - count, mean, variance (Welford), min, max
+            QuantileSketch - quantiles within a relative error
+'''
+
+import math
+
+
+class RunningStats:
+    ''' count, mean, variance, min and max of a stream of values,
+        add(x, n) counts the value x n times (Welford's update) '''
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x, n=1):
+        if n <= 0:
+            return
+        self.n += n
+        delta = x - self.mean
+        self.mean += delta * n / self.n
+        self._m2 += delta * (x - self.mean) * n
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    ''' streaming quantiles with relative error `rel_err`:
+        values are counted in logarithmic buckets (as in DDSketch),
+        so memory grows with log(max / min), not with the count,
+        and add(x, n) costs the same for any n
+        values <= min_value are counted as 0 '''
+
+    def __init__(self, rel_err=0.01, min_value=1e-6):
+        self.gamma = (1 + rel_err) / (1 - rel_err)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.buckets = {}
+        self.nzero = 0
+        self.n = 0
+
+    def add(self, x, n=1):
+        self.n += n
+        if x <= self.min_value:
+            self.nzero += n
+        else:
+            k = math.ceil(math.log(x) / self._log_gamma)
+            self.buckets[k] = self.buckets.get(k, 0) + n
+
+    def quantile(self, p):
+        if self.n == 0:
+            return math.nan
+        rank = p * (self.n - 1)
+        if rank < self.nzero:
+            return 0.0
+        count = self.nzero
+        for k in sorted(self.buckets):
+            count += self.buckets[k]
+            if count > rank:
+                return 2 * self.gamma ** k / (self.gamma + 1)
+        return 2 * self.gamma ** k / (self.gamma + 1)
+
+
+class Distribution:
+    ''' RunningStats plus median and 90th percentile estimates '''
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch()
+
+    def add(self, x, n=1):
+        self.stats.add(x, n)
+        self.sketch.add(x, n)
+
+    def summary(self, prefix):
+        s = self.stats
+        return {prefix + '_n'    : s.n,
+                prefix + '_mean' : s.mean,
+                prefix + '_std'  : s.std,
+                prefix + '_p50'  : self.sketch.quantile(0.5),
+                prefix + '_p90'  : self.sketch.quantile(0.9),
+                prefix + '_max'  : s.max if s.n else math.nan}
+
+
+class SimStats:
+    ''' metrics of one simulation run
+            rider wait time:  arrival at a floor to boarding
+            rider ride time:  boarding to leaving the elevator
+            per elevator:  idle time (-> utilization),
+                           load factor (nriders / maxriders at each move),
+                           trips (cycles back to the bottom floor)
+        `counts` holds the end-of-run totals set by the simulation
+    '''
+
+    def __init__(self, nelevs):
+        self.wait = Distribution()
+        self.ride = Distribution()
+        self.idle = [0.0] * nelevs
+        self.load = [RunningStats() for i in range(nelevs)]
+        self.trips = [0] * nelevs
+        self.counts = {}
+        self.t_elapsed = 0.0
+
+    def add_wait(self, dt, n=1):
+        self.wait.add(dt, n)
+
+    def add_ride(self, dt, n=1):
+        self.ride.add(dt, n)
+
+    def add_idle(self, ielev, dt):
+        self.idle[ielev] += dt
+
+    def add_load(self, ielev, load_factor):
+        self.load[ielev].add(load_factor)
+
+    def add_trip(self, ielev):
+        self.trips[ielev] += 1
+
+    def utilization(self, ielev):
+        if not self.t_elapsed:
+            return 0.0
+        return 1 - self.idle[ielev] / self.t_elapsed
+
+    def per_elevator(self):
+        ''' list of dicts, one per elevator '''
+        return [{'utilization' : self.utilization(i),
+                 'load_factor' : self.load[i].mean,
+                 'trips'       : self.trips[i]}
+                for i in range(len(self.trips))]
+
+    def summary(self):
+        ''' flat dict for one row of a table of runs,
+            the elevator metrics are averaged over the elevators '''
+        nelevs = len(self.trips)
+        res = dict(self.counts)
+        res.update(self.wait.summary('wait'))
+        res.update(self.ride.summary('ride'))
+        res['utilization'] = sum(self.utilization(i)
+                                 for i in range(nelevs)) / nelevs
+        res['load_factor'] = sum(s.mean for s in self.load) / nelevs
+        return res
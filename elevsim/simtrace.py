@@ -0,0 +1,137 @@
+'''
+        recorded arrival traces for elevsim
+
+        instead of drawing random arrivals, a run can replay a trace
+        (config key `arrival_trace`), e.g. a real building's morning peak;
+        one record per group of riders:
+            t       seconds from the start of the run, in time order
+            floor   floor index where the riders arrive (0 is the bottom)
+            bdir    DIR_UP or DIR_DOWN (simevents)
+            dest    destination floor index
+            count   number of riders
+
+        files are read lazily, in chunks of records (numpy arrays of
+        TRACE_DTYPE), so a trace never has to fit in memory:
+            csv     header  time,floor,direction,destination,count
+                    with direction `up` or `down`
+            binary  TRACE_DTYPE records after a short header, as written
+                    by `write_trace`, detected by its magic bytes
+
+        usage:  python simtrace.py trace.csv trace.bin   (csv to binary)
+'''
+
+import csv
+import itertools
+import struct
+from sys import argv
+
+import numpy as np
+
+from simevents import DIR_UP, DIR_DOWN
+
+
+TRACE_DTYPE = np.dtype([('t',     '<f8'),
+                        ('floor', '<i4'),
+                        ('bdir',  'i1'),
+                        ('dest',  '<i4'),
+                        ('count', '<i4')])
+
+TRACE_MAGIC = b'ELEVTRCE'
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct('<8sII')
+
+CSV_FIELDS = ('time', 'floor', 'direction', 'destination', 'count')
+CSV_DIRS = {'up' : DIR_UP, 'down' : DIR_DOWN}
+
+
+def read_trace(filename, chunk_size=1 << 16, t_max=None):
+    ''' generator of TRACE_DTYPE chunks of up to chunk_size records,
+        stops at the first record at or after t_max '''
+    with open(filename, 'rb') as f:
+        isbinary = f.read(len(TRACE_MAGIC)) == TRACE_MAGIC
+    chunks = (_read_binary(filename, chunk_size) if isbinary
+              else _read_csv(filename, chunk_size))
+    for chunk in chunks:
+        if t_max is not None:
+            late = np.flatnonzero(chunk['t'] >= t_max)
+            if len(late):
+                yield chunk[:late[0]]
+                chunks.close()
+                return
+        yield chunk
+
+
+def _read_binary(filename, chunk_size):
+    with open(filename, 'rb') as f:
+        magic, version, itemsize = TRACE_HEADER.unpack(
+                                       f.read(TRACE_HEADER.size))
+        if version != TRACE_VERSION or itemsize != TRACE_DTYPE.itemsize:
+            raise ValueError('{}: unsupported trace file version {}'.format(
+                             filename, version))
+        while True:
+            chunk = np.fromfile(f, dtype=TRACE_DTYPE, count=chunk_size)
+            if len(chunk) == 0:
+                return
+            yield chunk
+
+
+def _read_csv(filename, chunk_size):
+    with open(filename, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None or tuple(h.strip() for h in header) != CSV_FIELDS:
+            raise ValueError('{}: trace csv must start with the header {}'
+                             .format(filename, ','.join(CSV_FIELDS)))
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            try:
+                recs = [(float(t), int(floor), CSV_DIRS[bdir.strip()],
+                         int(dest), int(count))
+                        for t, floor, bdir, dest, count in rows]
+            except (KeyError, ValueError) as e:
+                raise ValueError('{}: bad trace record near line {}: {}'
+                                 .format(filename, reader.line_num, e))
+            yield np.array(recs, dtype=TRACE_DTYPE)
+
+
+def check_trace(chunk, nfloors, t_prev=None):
+    ''' raise ValueError for records that do not fit a building
+        of nfloors floors, or that are out of time order;
+        t_prev is the time of the last record of the previous chunk '''
+    floor, dest, bdir = chunk['floor'], chunk['dest'], chunk['bdir']
+    bad = ((floor < 0) | (floor >= nfloors) | (dest < 0) | (dest >= nfloors)
+           | (chunk['count'] < 0)
+           | ((bdir == DIR_UP) & (dest <= floor))
+           | ((bdir == DIR_DOWN) & (dest >= floor))
+           | ((bdir != DIR_UP) & (bdir != DIR_DOWN)))
+    if bad.any():
+        i = int(np.flatnonzero(bad)[0])
+        raise ValueError('trace record {} does not fit {} floors'.format(
+                         chunk[i], nfloors))
+    t = chunk['t']
+    if len(t) and t_prev is not None and t[0] < t_prev:
+        raise ValueError('trace record {} is out of time order, after '
+                         'a record at {}'.format(chunk[0], t_prev))
+    back = np.flatnonzero(np.diff(t) < 0)
+    if len(back):
+        i = int(back[0]) + 1
+        raise ValueError('trace record {} is out of time order, after '
+                         'a record at {}'.format(chunk[i], t[i - 1]))
+
+
+def write_trace(filename, chunks):
+    ''' write TRACE_DTYPE chunks as a binary trace file '''
+    with open(filename, 'wb') as f:
+        f.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION,
+                                  TRACE_DTYPE.itemsize))
+        for chunk in chunks:
+            np.asarray(chunk, dtype=TRACE_DTYPE).tofile(f)
+
+
+if __name__ == "__main__":
+    if len(argv) == 3:
+        write_trace(argv[2], read_trace(argv[1]))
+    else:
+        print('usage:  python simtrace.py trace.csv trace.bin')
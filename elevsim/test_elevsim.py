@@ -0,0 +1,375 @@
+import asyncio
+import inspect
+import itertools
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import yaml
+
+import elevsweep
+from elevsim3 import run_sim, set_event_logging, min_cost_assignment, \
+                     FloorMask, Elevator, VirtualTimeEventLoop, STRATEGIES, \
+                     DEFAULT_SIM_CONFIG
+from riders import RiderStore
+from simconfig import (config_errors, compile_config, ConfigError,
+                       ElevSettings, STRATEGY_OPTIONS)
+from simstats import SimStats
+from simtrace import read_trace, check_trace, write_trace, TRACE_DTYPE
+from simevents import (EventSink, BinaryEventHandler, read_events,
+                       EVENT_DTYPE, ENTITY_FLOOR, ENTITY_ELEV,
+                       DIR_NONE, DIR_UP, DIR_DOWN, EV_LOAD, EV_MOVE, EV_WAIT)
+
+
+class TestSimConfig(unittest.TestCase):
+    '''
+        simconfig - config validation and the strategy registry
+    '''
+
+    def config(self, **changes):
+        config = yaml.safe_load(DEFAULT_SIM_CONFIG)
+        config.update(changes)
+        return config
+
+    def test_valid(self):
+        self.assertEqual(config_errors(self.config()), [])
+        settings = compile_config(self.config(
+                       dispatch='batch', dispatch_options={'tick' : 0.2}))
+        self.assertEqual(settings.dispatch_options, (('tick', 0.2),))
+        self.assertEqual(settings.elev_count, 3)
+
+    def test_strategy_options(self):
+        ''' the registry lists the named __init__ arguments of each
+            strategy class, with those of the bases it passes
+            **kwargs on to '''
+        self.assertEqual(set(STRATEGIES), set(STRATEGY_OPTIONS))
+        for name, cls in STRATEGIES.items():
+            names = set()
+            for base in cls.__mro__:
+                if '__init__' not in vars(base) or base is object:
+                    continue
+                params = list(inspect.signature(
+                                  base.__init__).parameters.values())[1:]
+                names.update(p.name for p in params
+                             if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD))
+                if all(p.kind != p.VAR_KEYWORD for p in params):
+                    break
+            self.assertEqual(names, set(STRATEGY_OPTIONS[name]), name)
+
+    def test_errors(self):
+        for changes, errors in (
+                ({'dispatch' : 'eta', 'dispatch_options' : {'tick' : 1}},
+                 ['dispatch_options/tick: not an option of eta dispatch '
+                  '(floor_time, full_penalty, load_penalty, stop_time)']),
+                ({'dispatch_options' : {'tick' : 1}},
+                 ['dispatch_options/tick: not an option of nearest '
+                  'dispatch']),
+                ({'dispatch' : 'batch', 'dispatch_options' : {'tick' : 0}},
+                 ['dispatch_options/tick: 0 is less than or equal to the '
+                  'minimum of 0']),
+                ({'dispatch' : 'fast'},
+                 ["dispatch: 'fast' is not one of ['nearest', 'eta', "
+                  "'batch']"]),
+                ({'running_time' : -1},
+                 ['running_time: -1 is less than or equal to the minimum '
+                  'of 0']),
+                ({'arrival_rate' : [1, 2]},
+                 ['arrival_rate: 2 rates for 4 floors']),
+                ({'floor_count' : 5},
+                 ['elevators/{}/floors_served: must equal floor_count 5'
+                  .format(i) for i in range(3)])):
+            self.assertEqual(config_errors(self.config(**changes)), errors)
+        with self.assertRaisesRegex(ConfigError,
+                                    'invalid elevsim config:\n  dispatch:'):
+            compile_config(self.config(dispatch='fast'))
+
+
+class TestElevSweep(unittest.TestCase):
+    '''
+        elevsweep - the parameter grid of a sweep
+    '''
+
+    GRID = {'floor_count'  : [4, 8],
+            'elevators'    : [2],
+            'maxriders'    : [10],
+            'arrival_rate' : [0.5]}
+
+    def test_grid_points(self):
+        points = list(elevsweep.grid_points(self.GRID, [1, 2]))
+        self.assertEqual(len(points), 4)
+        self.assertEqual(points[0], {'floor_count' : 4, 'elevators' : 2,
+                                     'maxriders' : 10, 'arrival_rate' : 0.5,
+                                     'dispatch' : 'nearest', 'seed' : 1})
+        self.assertEqual([p['seed'] for p in points], [1, 2, 1, 2])
+
+    def test_grid_bad_keys(self):
+        grid = dict(self.GRID, elevator_count=[3])
+        with self.assertRaisesRegex(ValueError, "'elevator_count'"):
+            list(elevsweep.grid_points(grid, [1]))
+        grid = dict(self.GRID)
+        del grid['maxriders']
+        with self.assertRaisesRegex(ValueError, "'maxriders' is missing"):
+            list(elevsweep.grid_points(grid, [1]))
+
+
+class TestFloorMask(unittest.TestCase):
+    '''
+        FloorMask - set of floors as the bits of an int
+    '''
+
+    TOP = 9
+
+    def mask(self, floors):
+        mask = FloorMask()
+        for floor in floors:
+            mask[floor] = True
+        return mask
+
+    def test_empty(self):
+        mask = FloorMask()
+        self.assertFalse(mask)
+        self.assertEqual(mask.count(), 0)
+        for floor in (0, 4, self.TOP):
+            self.assertIsNone(mask.next_up(floor))
+            self.assertIsNone(mask.next_down(floor))
+
+    def test_set_and_clear(self):
+        mask = self.mask([0, 4, self.TOP])
+        self.assertTrue(mask[4])
+        self.assertFalse(mask[5])
+        self.assertEqual(mask.count(), 3)
+        mask[4] = False
+        mask[0] = True
+        self.assertEqual(mask.count(), 2)
+        self.assertEqual([f for f in range(self.TOP + 1) if mask[f]],
+                         [0, self.TOP])
+
+    def test_next_up_down(self):
+        mask = self.mask([0, 4, self.TOP])
+        #the floor itself counts
+        self.assertEqual(mask.next_up(4), 4)
+        self.assertEqual(mask.next_down(4), 4)
+        self.assertEqual(mask.next_up(0), 0)
+        self.assertEqual(mask.next_down(0), 0)
+        self.assertEqual(mask.next_up(self.TOP), self.TOP)
+        self.assertEqual(mask.next_down(self.TOP), self.TOP)
+        self.assertEqual(mask.next_up(1), 4)
+        self.assertEqual(mask.next_down(8), 4)
+        self.assertEqual(mask.next_up(5), self.TOP)
+        self.assertEqual(mask.next_down(3), 0)
+        #nothing beyond the ends
+        mask = self.mask([4])
+        self.assertIsNone(mask.next_up(5))
+        self.assertIsNone(mask.next_up(self.TOP))
+        self.assertIsNone(mask.next_down(3))
+        self.assertIsNone(mask.next_down(0))
+
+    def test_against_list(self):
+        rng = np.random.default_rng(9)
+        for trial in range(50):
+            floors = [f for f in range(self.TOP + 1) if rng.random() < 0.3]
+            mask = self.mask(floors)
+            self.assertEqual(mask.count(), len(floors))
+            for floor in range(self.TOP + 1):
+                up = [f for f in floors if f >= floor]
+                down = [f for f in floors if f <= floor]
+                self.assertEqual(mask.next_up(floor), min(up, default=None))
+                self.assertEqual(mask.next_down(floor),
+                                 max(down, default=None))
+
+
+class TestDispatch(unittest.TestCase):
+    '''
+        min_cost_assignment - Hungarian algorithm of BatchMatching
+        run_sim - seeded runs of each dispatch strategy
+    '''
+
+    def brute_force(self, cost):
+        ''' lowest total cost over all assignments of distinct columns '''
+        n, m = cost.shape
+        return min(cost[range(n), cols].sum()
+                   for cols in itertools.permutations(range(m), n))
+
+    def test_min_cost_assignment(self):
+        rng = np.random.default_rng(8)
+        for n, m in ((1, 1), (2, 2), (3, 3), (5, 5), (1, 4), (2, 5), (3, 6),
+                     (4, 7)):
+            for trial in range(20):
+                #integer costs, so that there are ties
+                cost = rng.integers(0, 10, (n, m)).astype(float)
+                cols = min_cost_assignment(cost)
+                self.assertEqual(len(set(cols)), n)
+                self.assertTrue(all(0 <= j < m for j in cols))
+                self.assertEqual(cost[range(n), cols].sum(),
+                                 self.brute_force(cost), (n, m, trial))
+
+    def test_seeded_runs(self):
+        set_event_logging(None, vis=False)
+        config = yaml.safe_load(DEFAULT_SIM_CONFIG)
+        config.update(running_time=20, seed=5, virtual_time=True)
+        for dispatch in ('nearest', 'eta', 'batch'):
+            config['dispatch'] = dispatch
+            one, two = run_sim(config), run_sim(config)
+            del one['wall_time'], two['wall_time']
+            self.assertEqual(one, two, dispatch)
+            self.assertGreater(one['delivered'], 0, dispatch)
+
+
+class TestElevator(unittest.TestCase):
+    '''
+        Elevator - boarding and unloading runs of rider ids
+    '''
+
+    def test_board_unload(self):
+        set_event_logging(None, vis=False)
+        riders = RiderStore()
+        stats = SimStats(1)
+        elev = Elevator(0, ElevSettings('elev.1', 6, 20), stats)
+
+        async def trip():
+            loop = asyncio.get_running_loop()
+            first = riders.add([0, 0, 0], [3, 5, 3], loop.time())
+            second = riders.add([0, 0], [5, 2], loop.time())
+            await asyncio.sleep(2)
+            elev.board(riders, [range(first, first + 3),
+                                range(second, second + 2)], 5)
+            self.assertEqual(list(elev.aboard[3]), [first, first + 2])
+            self.assertEqual(list(elev.aboard[5]), [first + 1, second])
+            self.assertEqual([f for f in range(6) if elev.upreqs[f]],
+                             [2, 3, 5])
+            await asyncio.sleep(3)
+            elev.curfloor = 3
+            self.assertEqual(elev.unload(riders), 2)
+            self.assertEqual(elev.unload(riders), 0)
+
+        loop = VirtualTimeEventLoop()
+        try:
+            loop.run_until_complete(trip())
+        finally:
+            loop.close()
+        cols = riders.columns()
+        self.assertEqual(cols['t_board'].tolist(), [2.0] * 5)
+        self.assertEqual(cols['t_alight'][[0, 2]].tolist(), [5.0, 5.0])
+        self.assertTrue(all(math.isnan(t) for t in cols['t_alight'][[1, 3, 4]]))
+        self.assertEqual(elev.nriders, 3)
+        self.assertEqual((stats.wait.stats.n, stats.wait.stats.mean), (5, 2))
+        self.assertEqual((stats.ride.stats.n, stats.ride.stats.mean), (2, 3))
+
+
+class TestSimEvents(unittest.TestCase):
+    '''
+        EventSink - buffered event records
+        BinaryEventHandler, read_events - binary event files
+    '''
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'events.bin')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_binary_round_trip(self):
+        events = [(0.0, ENTITY_ELEV, 0, EV_LOAD, 3, 0, DIR_UP),
+                  (0.5, ENTITY_FLOOR, 2, EV_WAIT, 7, 2, DIR_DOWN),
+                  (1.25, ENTITY_ELEV, 1, EV_MOVE, 0, 4, DIR_NONE)] * 5
+        handler = BinaryEventHandler(self.path)
+        #a capacity of 4 spreads the events over several chunks
+        sink = EventSink([handler], capacity=4, nbuffers=2)
+        for event in events:
+            sink.record(*event)
+        sink.close()
+        handler.close()
+        cols = read_events(self.path)
+        self.assertEqual(list(cols), list(EVENT_DTYPE.names))
+        read_back = list(zip(*(cols[name].tolist()
+                               for name in EVENT_DTYPE.names)))
+        self.assertEqual(read_back, events)
+
+    def test_no_events_no_file(self):
+        handler = BinaryEventHandler(self.path)
+        sink = EventSink([handler])
+        sink.close()
+        handler.close()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestSimTrace(unittest.TestCase):
+    '''
+        read_trace, write_trace - csv and binary arrival traces
+        check_trace - records that fit the building, in time order
+    '''
+
+    CSV = ('time,floor,direction,destination,count\n'
+           '0.5,0,up,3,2\n'
+           '1.0,2,down,0,1\n'
+           '1.0,1,up,2,4\n'
+           '2.5,3,down,1,1\n'
+           '4.0,0,up,1,3\n')
+    RECORDS = [(0.5, 0, DIR_UP, 3, 2), (1.0, 2, DIR_DOWN, 0, 1),
+               (1.0, 1, DIR_UP, 2, 4), (2.5, 3, DIR_DOWN, 1, 1),
+               (4.0, 0, DIR_UP, 1, 3)]
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmpdir.name, 'trace.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write(self.CSV)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def records(self, chunks):
+        return [rec for chunk in chunks for rec in chunk.tolist()]
+
+    def test_read_csv(self):
+        chunks = list(read_trace(self.csv_path, chunk_size=2))
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+        self.assertEqual(chunks[0].dtype, TRACE_DTYPE)
+        self.assertEqual(self.records(chunks), self.RECORDS)
+
+    def test_read_binary(self):
+        bin_path = os.path.join(self.tmpdir.name, 'trace.bin')
+        write_trace(bin_path, read_trace(self.csv_path, chunk_size=2))
+        chunks = list(read_trace(bin_path, chunk_size=3))
+        self.assertEqual([len(c) for c in chunks], [3, 2])
+        self.assertEqual(self.records(chunks), self.RECORDS)
+
+    def test_t_max(self):
+        for chunk_size in (1, 2, 3, 10):
+            for t_max, n in ((0.5, 0), (1.0, 1), (2.0, 3), (4.0, 4),
+                             (9.0, 5)):
+                chunks = read_trace(self.csv_path, chunk_size, t_max)
+                self.assertEqual(self.records(chunks), self.RECORDS[:n],
+                                 (chunk_size, t_max))
+
+    def test_check_trace(self):
+        chunk = np.array(self.RECORDS, dtype=TRACE_DTYPE)
+        check_trace(chunk, 4)
+        check_trace(chunk[2:], 4, t_prev=1.0)
+        with self.assertRaisesRegex(ValueError, 'does not fit 3 floors'):
+            check_trace(chunk, 3)
+        with self.assertRaisesRegex(ValueError, 'out of time order'):
+            check_trace(chunk[2:], 4, t_prev=1.5)
+        unsorted = chunk.copy()
+        unsorted['t'][3] = 0.9
+        with self.assertRaisesRegex(ValueError,
+                                    r'\(0\.9, 3, 2, 1, 1\) is out of time '
+                                    r'order, after a record at 1\.0'):
+            check_trace(unsorted, 4)
+
+    def test_unsorted_run(self):
+        with open(self.csv_path, 'a') as f:
+            f.write('3.0,1,up,3,1\n')
+        config = yaml.safe_load(DEFAULT_SIM_CONFIG)
+        config.update(running_time=10, virtual_time=True,
+                      arrival_trace=self.csv_path)
+        set_event_logging(None, vis=False)
+        with self.assertRaisesRegex(ValueError, 'out of time order'):
+            run_sim(config)
+
+
+if __name__ == '__main__':
+    unittest.main()
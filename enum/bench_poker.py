@@ -0,0 +1,187 @@
+'''
+        full-deck benchmark and regression check of the poker hand
+        evaluation
+
+        for all 2,598,960 five-card hands:  times classify_hand,
+        hand_strength, PokerHand construction, beats, codes_strength
+        and classify_many (with numpy), checks that each PokerHandRank
+        occurs as often as it should (HAND_RANK_COUNTS), that the
+        strengths agree with the hand ranks of classify_hand and make
+        up the 7462 distinct hand values of poker;  then times the best
+        hand of random 7-card hands, codes_best_strength against the
+        best of the 21 five-card subsets
+
+        the rates are appended to a json file of runs (bench_poker.json
+        in the current directory by default, ignored by git) and
+        compared with the previous run of the same number of hands:
+        a rate more than TOLERANCE below it is reported as slower, and
+        the exit status is 1 for that or for a failed check
+
+        usage:  python bench_poker.py [nhands] [--results file.json]
+                (default: all hands)
+'''
+
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+
+from poker import (PlayingCard, PokerHand, PokerHandRank, HAND_RANK_COUNTS,
+                   hand_strength, codes_strength, codes_best_strength,
+                   classify_many)
+
+TOLERANCE = 0.15
+RESULTS_FILE = 'bench_poker.json'
+
+
+def all_hands(nhands=None):
+    return list(itertools.islice(itertools.combinations(list(PlayingCard), 5),
+                                 nhands))
+
+
+def timed(label, func, items, rates):
+    ''' returns the results of func for each item,
+        records the items per second in rates[label] '''
+    t0 = time.perf_counter()
+    results = [func(item) for item in items]
+    dt = time.perf_counter() - t0
+    rates[label] = len(items) / dt
+    print('{:16} {:8.2f}s {:12,.0f} hands/s'.format(label, dt, rates[label]))
+    return results
+
+
+def check_counts(label, hand_ranks):
+    ''' compares the hand rank frequencies of all the hands with
+        HAND_RANK_COUNTS, returns the number of wrong counts '''
+    counts = Counter(hand_ranks)
+    wrong = [r for r in PokerHandRank if counts[r] != HAND_RANK_COUNTS[r]]
+    for r in wrong:
+        print('{}: {:,} {}, expected {:,}'.format(label, counts[r], r.name,
+                                                 HAND_RANK_COUNTS[r]))
+    if not wrong:
+        print('{}: hand rank counts ok'.format(label))
+    return len(wrong)
+
+
+def best_of_subsets(codes):
+    return max(codes_strength(hand) for hand in itertools.combinations(codes, 5))
+
+
+def bench_seven(nhands, rates):
+    ''' returns the number of mismatches '''
+    rng = random.Random(7)
+    hands = [rng.sample(range(52), 7) for i in range(nhands)]
+    print('{:,} random 7-card hands'.format(nhands))
+    subsets = timed('21 subsets', best_of_subsets, hands, rates)
+    best = timed('best_strength', codes_best_strength, hands, rates)
+    mismatches = sum(a != b for a, b in zip(subsets, best))
+    print('best_strength mismatches:', mismatches)
+    return mismatches
+
+
+def bench_five(nhands, rates):
+    ''' returns the number of failed checks '''
+    hands = all_hands(nhands)
+    full_deck = len(hands) == sum(HAND_RANK_COUNTS.values())
+    print('{:,} hands'.format(len(hands)))
+    failures = 0
+
+    classified = timed('classify_hand', PokerHandRank.classify_hand, hands,
+                       rates)
+    strengths = timed('hand_strength', hand_strength, hands, rates)
+    poker_hands = timed('PokerHand', PokerHand, hands, rates)
+    pairs = list(zip(poker_hands, poker_hands[1:]))
+    timed('beats', lambda pair: pair[0].beats(pair[1]), pairs, rates)
+
+    mismatches = sum(s >> 20 != c[0].value
+                     for s, c in zip(strengths, classified))
+    print('hand rank mismatches:', mismatches)
+    failures += mismatches > 0
+    if full_deck:
+        failures += check_counts('classify_hand', [c[0] for c in classified])
+        failures += check_counts('PokerHand', [h.hand_rank for h in poker_hands])
+        print('distinct strengths:', len(set(strengths)))
+        failures += len(set(strengths)) != 7462
+
+    #hands as card codes, 5 bytes each
+    codes = array('B', (c.code for cards in hands for c in cards))
+    hand_codes = [codes[i:i + 5] for i in range(0, len(codes), 5)]
+    timed('codes_strength', codes_strength, hand_codes, rates)
+
+    #all hands in one call
+    try:
+        import numpy as np
+    except ImportError:
+        return failures
+    batch = np.frombuffer(codes, dtype=np.uint8).reshape(-1, 5)
+    t0 = time.perf_counter()
+    hand_ranks, batch_strengths = classify_many(batch)
+    dt = time.perf_counter() - t0
+    rates['classify_many'] = len(batch) / dt
+    print('{:16} {:8.2f}s {:12,.0f} hands/s'.format('classify_many', dt,
+                                                    rates['classify_many']))
+    mismatches = int((batch_strengths != np.array(strengths)).sum())
+    print('classify_many mismatches:', mismatches)
+    return failures + (mismatches > 0)
+
+
+def load_runs(results_file):
+    try:
+        with open(results_file) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def compare(rates, previous):
+    ''' prints the rates against a previous run, returns the number
+        of rates more than TOLERANCE below it '''
+    print('compared with the run of {}:'.format(previous['time']))
+    slower = 0
+    for label, rate in rates.items():
+        if label not in previous['rates']:
+            continue
+        ratio = rate / previous['rates'][label]
+        flag = ''
+        if ratio < 1 - TOLERANCE:
+            flag = '  SLOWER'
+            slower += 1
+        print('{:16} {:12,.0f} hands/s {:7.2f}x{}'.format(label, rate, ratio,
+                                                         flag))
+    return slower
+
+
+def main(nhands=None, results_file=RESULTS_FILE):
+    ''' returns the number of failed checks and slower rates '''
+    rates = {}
+    failures = bench_seven(min(nhands or 200000, 200000), rates) > 0
+    failures += bench_five(nhands, rates)
+
+    runs = load_runs(results_file)
+    same_size = [r for r in runs if r['nhands'] == nhands]
+    slower = compare(rates, same_size[-1]) if same_size else 0
+    runs.append({'time'   : time.strftime('%Y-%m-%d %H:%M:%S'),
+                 'nhands' : nhands,
+                 'python' : platform.python_version(),
+                 'rates'  : rates})
+    tmp_file = results_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(runs, f, indent=1)
+    os.replace(tmp_file, results_file)
+    print('results saved to', results_file)
+    return failures + slower
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    results_file = RESULTS_FILE
+    if '--results' in args:
+        i = args.index('--results')
+        results_file = args[i + 1]
+        del args[i:i + 2]
+    sys.exit(1 if main(int(args[0]) if args else None, results_file) else 0)
@@ -0,0 +1,204 @@
+'''
+        poker hand equity:  how often a hand wins against opponents
+
+        given the known cards of a 5-card hand (0 to 5 of them) and a
+        number of opponents, the missing cards and the opponents'
+        hands are dealt from the rest of the deck;  a deal is won if
+        the hand's strength beats every opponent, and a tie with k
+        opponents counts 1 / (k + 1) towards the equity
+
+        Monte Carlo:  deals are drawn and ranked in numpy batches
+        (poker.classify_many), in tasks of TASK_TRIALS deals spread
+        over a process pool;  each task has its own seed, spawned from
+        the one seed of the run, so a seeded run gives the same result
+        for any number of workers;  rounds of tasks are added until the
+        95% confidence interval of the equity is within `tolerance`
+        exact:  when there are at most `exact_limit` possible deals,
+        they are all enumerated instead
+
+        usage:  python equity.py nopponents [CARD ...]
+                e.g. python equity.py 2 ACE_OF_SPADES ACE_OF_HEARTS
+'''
+
+import functools
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from sys import argv
+
+import numpy as np
+
+from poker import PlayingCard, classify_many
+
+TASK_TRIALS = 1 << 16
+Z95 = 1.959964
+
+
+def _score(hero, opponents):
+    ''' win, tie and equity arrays for hero strengths against
+        an nopponents x N array of opponent strengths '''
+    best = opponents.max(axis=0)
+    win = hero > best
+    tie = hero == best
+    ntied = (opponents == hero).sum(axis=0)
+    equity = np.where(win, 1.0, np.where(tie, 1.0 / (ntied + 1), 0.0))
+    return win, tie, equity
+
+
+def _deal_totals(known, deals, nopponents):
+    ''' (n, wins, ties, sum of equity, sum of equity squared) of the
+        deals, rows of the cards missing from the hand followed by
+        5 cards per opponent '''
+    nmissing = 5 - len(known)
+    hero = np.hstack([np.broadcast_to(np.array(known, dtype=np.uint8),
+                                      (len(deals), len(known))),
+                      deals[:, :nmissing]])
+    hero_strength = classify_many(hero)[1]
+    opponents = np.array([classify_many(deals[:, j:j + 5])[1]
+                          for j in range(nmissing, deals.shape[1], 5)])
+    win, tie, equity = _score(hero_strength, opponents)
+    return (len(deals), int(win.sum()), int(tie.sum()),
+            float(equity.sum()), float((equity * equity).sum()))
+
+
+def _add(totals, more):
+    return tuple(a + b for a, b in zip(totals, more))
+
+
+def run_task(known, nopponents, ntrials, seed):
+    ''' worker:  totals of ntrials random deals '''
+    rng = np.random.default_rng(seed)
+    rest = np.array([code for code in range(52) if code not in known],
+                    dtype=np.uint8)
+    ndealt = 5 - len(known) + 5 * nopponents
+    totals = (0, 0, 0, 0.0, 0.0)
+    for start in range(0, ntrials, 1 << 14):
+        n = min(1 << 14, ntrials - start)
+        deals = rng.permuted(np.tile(rest, (n, 1)), axis=1)[:, :ndealt]
+        totals = _add(totals, _deal_totals(known, deals, nopponents))
+    return totals
+
+
+def count_deals(nknown, nopponents):
+    ''' number of distinct deals, opponents in seat order '''
+    nrest = 52 - nknown
+    count = math.comb(nrest, 5 - nknown)
+    nrest -= 5 - nknown
+    for i in range(nopponents):
+        count *= math.comb(nrest, 5)
+        nrest -= 5
+    return count
+
+
+@functools.lru_cache(maxsize=None)
+def _combinations(n, k):
+    ''' all k of range(n), an array of C(n, k) x k indices '''
+    return np.fromiter(itertools.chain.from_iterable(
+                           itertools.combinations(range(n), k)),
+                       dtype=np.uint8).reshape(-1, k)
+
+
+def _prefixes(rest, nmissing, nopponents):
+    ''' yields (cards dealt, cards left) for every way of dealing
+        the hand's missing cards and all the opponents but the last '''
+    def deal(cards, ncards, nhands):
+        if nhands == 0:
+            yield (), cards
+            return
+        for hand in itertools.combinations(cards, ncards):
+            others = [c for c in cards if c not in hand]
+            for more, left in deal(others, 5, nhands - 1):
+                yield hand + more, left
+    return deal(rest, nmissing, nopponents)    #the hand and nopponents - 1
+
+
+def exact_totals(known, nopponents, chunk=1 << 16):
+    ''' totals of every deal:  the last opponent's hands are all the
+        5-card combinations of the cards left, in numpy blocks '''
+    rest = [code for code in range(52) if code not in known]
+    totals = (0, 0, 0, 0.0, 0.0)
+    for prefix, left in _prefixes(rest, 5 - len(known), nopponents):
+        last = np.array(left, dtype=np.uint8)[_combinations(len(left), 5)]
+        for start in range(0, len(last), chunk):
+            block = last[start:start + chunk]
+            deals = np.hstack([np.broadcast_to(np.array(prefix, dtype=np.uint8),
+                                               (len(block), len(prefix))),
+                               block])
+            totals = _add(totals, _deal_totals(known, deals, nopponents))
+    return totals
+
+
+def summarize(totals, exact):
+    n, wins, ties, eq_sum, eq_sq = totals
+    equity = eq_sum / n
+    if exact:
+        equity_ci = win_ci = 0.0
+    else:
+        var = max(eq_sq / n - equity * equity, 0.0) * n / max(n - 1, 1)
+        equity_ci = Z95 * math.sqrt(var / n)
+        p = wins / n
+        win_ci = Z95 * math.sqrt(p * (1 - p) / n)
+    return {'deals'     : n,
+            'exact'     : exact,
+            'win'       : wins / n,
+            'tie'       : ties / n,
+            'lose'      : (n - wins - ties) / n,
+            'equity'    : equity,
+            'win_ci'    : win_ci,       # 95% half-widths
+            'equity_ci' : equity_ci}
+
+
+def equity(cards, nopponents, trials=1 << 20, tolerance=None, seed=None,
+           max_workers=None, exact_limit=1 << 21):
+    ''' equity of the known cards (PlayingCards, up to 5) against
+        nopponents random 5-card hands, as a dict (see summarize)
+
+        trials:     Monte Carlo deals, or with tolerance the deals per
+                    round, repeated until the equity_ci <= tolerance
+                    (at most 64 rounds)
+        seed:       for repeatable results, any number of workers
+        max_workers defaults to all cores
+        exact_limit:  enumerate all the deals if there are no more,
+                    the default takes in a full hand against one
+                    opponent (1,533,939 deals) '''
+    known = tuple(c.code for c in cards)
+    if len(known) > 5 or len(set(known)) != len(known):
+        raise ValueError('equity needs up to 5 distinct known cards')
+    if not 1 <= nopponents <= 9:
+        raise ValueError('1 to 9 opponents')
+    if count_deals(len(known), nopponents) <= exact_limit:
+        return summarize(exact_totals(known, nopponents), True)
+
+    seeds = np.random.SeedSequence(seed)
+    ntasks = max(1, math.ceil(trials / TASK_TRIALS))
+    workers = max_workers or os.cpu_count()
+    totals = (0, 0, 0, 0.0, 0.0)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for _ in range(64):
+            tasks = [executor.submit(run_task, known, nopponents,
+                                     min(TASK_TRIALS, trials - i * TASK_TRIALS),
+                                     task_seed)
+                     for i, task_seed in enumerate(seeds.spawn(ntasks))]
+            for task in tasks:
+                totals = _add(totals, task.result())
+            result = summarize(totals, False)
+            if tolerance is None or result['equity_ci'] <= tolerance:
+                return result
+    return result
+
+
+def main(nopponents, card_names):
+    cards = [PlayingCard[name] for name in card_names]
+    result = equity(cards, nopponents, tolerance=0.002, seed=1)
+    print(' '.join(str(c) for c in cards) or '(no known cards)',
+          'against {} opponents'.format(nopponents))
+    for key, value in result.items():
+        print('{:10} {}'.format(key, value))
+
+
+if __name__ == "__main__":
+    if len(argv) >= 2:
+        main(int(argv[1]), argv[2:])
+    else:
+        print('usage:  python equity.py nopponents [CARD ...]')
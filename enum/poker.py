@@ -1,5 +1,8 @@
 import enum
+import itertools
+import random
 from collections import Counter
+from functools import cached_property
 
 class Suit(enum.Enum):
     SPADES   = (4, '♠')
@@ -40,17 +43,20 @@ class PlayingCardMeta(enum.EnumMeta):
 
 class PlayingCard(enum.Enum, metaclass=PlayingCardMeta):
 
-    @property
-    def rank(self):
-        return self.value[1]
-    
-    @property    
-    def suit(self):
-        return self.value[2]
-        
+    def __init__(self, order, rank, suit, label):
+        #integer code 0-51 in card order:  rank index << 2 | suit index
+        #code, rank and suit are plain attributes, set once per member
+        self.code = order - 1
+        self.rank = rank
+        self.suit = suit
+
+    @classmethod
+    def from_code(cls, code):
+        return CARDS[code]
+
     @classmethod
     def get_card(self, rank, suit):
-        return self.__dict__[rank.name + '_OF_' + suit.name]    
+        return _CARD_BY_RANK_SUIT[rank, suit]
                    
     def __repr__(self): 
         return self.name
@@ -76,6 +82,64 @@ class PlayingCard(enum.Enum, metaclass=PlayingCardMeta):
         return NotImplemented
                                 
 
+#integer codes and bitmasks
+#
+#a card code is 0-51, (rank value - 2) << 2 | (suit value - 1), so codes
+#sort like cards and fit array('B') or numpy uint8 buffers
+#a hand (any set of cards) is a 52-bit mask, bit 13 * suit index + 
+#rank index, so each suit is a 13-bit field of ranks (see suit_ranks)
+
+CARDS = tuple(sorted(PlayingCard, key=lambda c: c.code))    #by code
+_CARD_BY_RANK_SUIT = {(c.rank, c.suit): c for c in CARDS}
+_CODE_BIT = [1 << (code & 3) * 13 + (code >> 2) for code in range(52)]
+
+
+def code_rank(code):
+    return (code >> 2) + 2
+
+def code_suit(code):
+    return (code & 3) + 1
+
+def cards_to_codes(cards):
+    return [c.code for c in cards]
+
+def codes_to_cards(codes):
+    return [CARDS[code] for code in codes]
+
+def codes_to_mask(codes):
+    mask = 0
+    for code in codes:
+        mask |= _CODE_BIT[code]
+    return mask
+
+def cards_to_mask(cards):
+    return codes_to_mask(c.code for c in cards)
+
+def mask_to_codes(mask):
+    ''' codes of the cards in a mask, in code order '''
+    return sorted((bit % 13) << 2 | bit // 13 
+                  for bit in range(52) if mask >> bit & 1)
+
+def mask_to_cards(mask):
+    return codes_to_cards(mask_to_codes(mask))
+
+def shuffled_codes(rng=random):
+    ''' the 52 card codes in random order, a new list;
+        rng is anything with shuffle, e.g. a seeded random.Random '''
+    codes = list(range(52))
+    rng.shuffle(codes)
+    return codes
+
+def shuffled_deck(rng=random):
+    ''' the 52 PlayingCards in random order, a new list '''
+    return [CARDS[code] for code in shuffled_codes(rng)]
+
+def suit_ranks(mask):
+    ''' the rank bitfields of a mask, 13 bits each (bit 0 is TWO)
+        in suit value order:  clubs, diamonds, hearts, spades '''
+    return tuple(mask >> 13 * s & 0x1FFF for s in range(4))
+
+
 class PokerHandRank(enum.Enum):
 
     STRAIGHT_FLUSH   = 9
@@ -179,6 +243,11 @@ class PokerHandRank(enum.Enum):
         for c in cards:
             if c > high:
                 high = c
+
+        #ace-low straight (wheel), its high card is the five
+        if [r.value[0] for r in sorted_ranks] == [2, 3, 4, 5, 14]:
+            is_straight = True
+            high = max(c for c in cards if c.rank == Rank.FIVE)
         
         if is_straight:
             if is_flush:
@@ -191,7 +260,256 @@ class PokerHandRank(enum.Enum):
             
         #default is lowest rank
         return (self.HIGH_CARD, high, None, None)
-        
+
+
+#lookup tables for hand_strength
+#
+#a hand's ranks (as a multiset) are identified by the product of one
+#prime per rank, which is the key of _RANK_TABLE;  flushes only
+#need an extra suit test as a flush has 5 distinct ranks
+#
+#the strength is an int:  hand rank << 20 followed by 4 bits per rank
+#in tie-break order, the ranks of the largest group first, higher 
+#ranks before lower ones, e.g. a full house 3,3,3,K,K is 7,3,13,0,0
+#and a pair of 9s with A,J,2 is 2,9,14,11,2,0;  the ace of an ace-low
+#straight (wheel) counts as 1, so it is 5,5,4,3,2,1
+#suits never break ties, so hands of equal strength are a tie
+
+_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+#indexed by card code
+_CODE_PRIME = [_PRIMES[code >> 2] for code in range(52)]
+_CODE_SUITBIT = [1 << (code & 3) for code in range(52)]
+
+_HAND_RANKS = [None] * 10
+for _r in PokerHandRank:
+    _HAND_RANKS[_r.value] = _r
+
+#how many of the 2,598,960 five-card hands have each rank
+HAND_RANK_COUNTS = {
+    PokerHandRank.STRAIGHT_FLUSH  : 40,
+    PokerHandRank.FOUR_OF_A_KIND  : 624,
+    PokerHandRank.FULL_HOUSE      : 3744,
+    PokerHandRank.FLUSH           : 5108,
+    PokerHandRank.STRAIGHT        : 10200,
+    PokerHandRank.THREE_OF_A_KIND : 54912,
+    PokerHandRank.TWO_PAIR        : 123552,
+    PokerHandRank.PAIR            : 1098240,
+    PokerHandRank.HIGH_CARD       : 1302540}
+
+
+def _pack(hand_rank, ranks):
+    strength = hand_rank
+    for i in range(5):
+        strength = strength << 4 | (ranks[i] if i < len(ranks) else 0)
+    return strength
+
+
+def _rank_strengths(ranks):
+    ''' (strength, strength as a flush) of 5 ranks in descending
+        order, the flush one is None unless the ranks are distinct '''
+    counts = Counter(ranks)
+    groups = sorted(counts, key=lambda r: (counts[r], r), reverse=True)
+    shape = sorted(counts.values(), reverse=True)
+    if shape[0] == 4:
+        return (_pack(8, groups), None)
+    elif shape[0] == 3:
+        return (_pack(7 if shape[1] == 2 else 4, groups), None)
+    elif shape[0] == 2:
+        return (_pack(3 if shape[1] == 2 else 2, groups), None)
+    if ranks == (14, 5, 4, 3, 2):
+        ranks = (5, 4, 3, 2, 1)
+    if ranks[0] - ranks[4] == 4:
+        return (_pack(5, ranks), _pack(9, ranks))
+    return (_pack(1, ranks), _pack(6, ranks))
+
+
+def _rank_table():
+    ''' _RANK_TABLE, filled on first use as it takes most of the
+        import time otherwise '''
+    if not _RANK_TABLE:
+        _RANK_TABLE.update(_build_rank_table())
+    return _RANK_TABLE
+
+
+def _build_rank_table():
+    table = {}
+    for ranks in itertools.combinations_with_replacement(range(14, 1, -1), 5):
+        if ranks[0] == ranks[4]:
+            continue     #5 of a kind
+        product = 1
+        for r in ranks:
+            product *= _PRIMES[r - 2]
+        table[product] = _rank_strengths(ranks)
+    return table
+
+_RANK_TABLE = {}
+
+
+def hand_strength(cards):
+    ''' integer strength of 5 PlayingCards:  a hand beats another
+        exactly if its strength is greater, equal strengths tie;
+        strength >> 20 is the PokerHandRank value '''
+    return codes_strength([c.code for c in cards])
+
+
+def codes_strength(codes):
+    ''' hand_strength of 5 card codes '''
+    product = 1
+    suits = 0
+    for code in codes:
+        product *= _CODE_PRIME[code]
+        suits |= _CODE_SUITBIT[code]
+    try:
+        strength, flush_strength = _RANK_TABLE[product]
+    except KeyError:
+        strength, flush_strength = _rank_table()[product]
+    if flush_strength and suits & (suits - 1) == 0:    #one suit
+        return flush_strength
+    return strength
+
+
+#best 5 of 7 cards (hold'em), from the rank counts and suits of all the
+#cards instead of the 21 five-card subsets:  rank bitfields of the ranks
+#seen at least 1, 2, 3 and 4 times and one per suit, looked up in tables
+#indexed by a 13-bit rank field, built on first use
+#with 7 cards a flush rules out four of a kind and a full house, so a
+#suit with 5 cards settles the hand
+
+_mask_tables = None
+
+def _build_mask_tables():
+    ''' (flush, straight, top) lists indexed by rank field:
+        strength of the best straight flush or flush (0 for fewer
+        than 5 ranks), strength of the best straight (0 for none)
+        and the rank values in descending order '''
+    global _mask_tables
+    if _mask_tables is None:
+        top = [tuple(r for r in range(14, 1, -1) if mask >> r - 2 & 1)
+               for mask in range(1 << 13)]
+        straights = [(0x1F << high - 6, high) for high in range(14, 5, -1)]
+        straights.append((0x100F, 5))     #wheel, A-2-3-4-5
+        straight = [0] * (1 << 13)
+        flush = [0] * (1 << 13)
+        for mask in range(1 << 13):
+            for bits, high in straights:
+                if mask & bits == bits:
+                    ranks = tuple(range(high, high - 5, -1))
+                    straight[mask] = _pack(5, ranks)
+                    flush[mask] = _pack(9, ranks)
+                    break
+            else:
+                if len(top[mask]) >= 5:
+                    flush[mask] = _pack(6, top[mask])
+        _mask_tables = (flush, straight, top)
+    return _mask_tables
+
+
+def best_strength(cards):
+    ''' strength of the best 5-card hand among 5 to 7 PlayingCards,
+        the same as the max hand_strength of all its 5-card subsets '''
+    return codes_best_strength([c.code for c in cards])
+
+
+def codes_best_strength(codes):
+    ''' best_strength of 5 to 7 distinct card codes '''
+    flush, straight, top = _mask_tables or _build_mask_tables()
+    suits = [0, 0, 0, 0]
+    seen1 = seen2 = seen3 = seen4 = 0
+    for code in codes:
+        bit = 1 << (code >> 2)
+        suits[code & 3] |= bit
+        if seen1 & bit:
+            if seen2 & bit:
+                if seen3 & bit:
+                    seen4 |= bit
+                else:
+                    seen3 |= bit
+            else:
+                seen2 |= bit
+        else:
+            seen1 |= bit
+
+    for suit in suits:
+        if flush[suit]:
+            return flush[suit]
+    if seen4:
+        quads = top[seen4][0]
+        return _pack(8, (quads, top[seen1 & ~seen4][0]))
+    if seen3:
+        trips = top[seen3][0]
+        pairs = seen2 & ~(1 << trips - 2)
+        if pairs:
+            return _pack(7, (trips, top[pairs][0]))
+    if straight[seen1]:
+        return straight[seen1]
+    if seen3:
+        return _pack(4, (trips,) + top[seen1 & ~seen3][:2])
+    if seen2:
+        pairs = top[seen2]
+        if len(pairs) >= 2:
+            bits = 1 << pairs[0] - 2 | 1 << pairs[1] - 2
+            return _pack(3, pairs[:2] + top[seen1 & ~bits][:1])
+        return _pack(2, pairs + top[seen1 & ~seen2][:3])
+    return _pack(1, top[seen1])
+
+
+#batch evaluation with numpy, imported on first use only
+
+_np_tables = None
+
+def _numpy_tables():
+    ''' _RANK_TABLE as numpy arrays sorted by product, for searchsorted '''
+    global _np_tables
+    if _np_tables is None:
+        import numpy as np
+        table = _rank_table()
+        products = sorted(table)
+        strengths = [table[p] for p in products]
+        _np_tables = (np.array(products, dtype=np.int64),
+                      np.array([s for s, fs in strengths], dtype=np.int32),
+                      np.array([fs or s for s, fs in strengths], dtype=np.int32),
+                      np.array(_PRIMES, dtype=np.int64))
+    return _np_tables
+
+
+def classify_many(codes, chunk_size=1 << 15):
+    ''' hand ranks and strengths of many hands at once:
+        codes is an N x 5 array of card codes (e.g. numpy uint8),
+        returns two numpy arrays of length N, the PokerHandRank values
+        (int8) and the hand_strength of each row (int32)
+        rows are done in chunks of chunk_size to bound the temporaries '''
+    import numpy as np
+    products_table, strength_table, flush_table, primes = _numpy_tables()
+
+    codes = np.asarray(codes)
+    if codes.ndim != 2 or codes.shape[1] != 5:
+        raise ValueError('classify_many needs an N x 5 array of card codes')
+    if codes.size and (codes.min() < 0 or codes.max() > 51):
+        raise ValueError('card codes must be 0-51')
+    strengths = np.empty(len(codes), dtype=np.int32)
+
+    for start in range(0, len(codes), chunk_size):
+        #one contiguous array per card position, so that every step 
+        #below is an elementwise operation over the chunk
+        cols = np.ascontiguousarray(codes[start:start + chunk_size].T,
+                                    dtype=np.int32)
+
+        bits = [np.left_shift(1, col, dtype=np.int64) for col in cols]
+        if (sum(bits) != np.bitwise_or.reduce(bits)).any():
+            raise ValueError('hands need distinct cards')
+
+        product = primes[cols[0] >> 2]
+        for col in cols[1:]:
+            product = product * primes[col >> 2]
+        i = np.searchsorted(products_table, product)
+
+        suit = cols[0] & 3
+        flush = np.logical_and.reduce([col & 3 == suit for col in cols[1:]])
+        strengths[start:start + len(i)] = np.where(flush, flush_table[i],
+                                                   strength_table[i])
+    return (strengths >> 20).astype(np.int8), strengths
+
 
 class PokerHand():
     ''' instance of an ordered poker hand with containing a 
@@ -214,49 +532,51 @@ class PokerHand():
             raise ValueError('Poker Hand Error: instance needs distinct cards')    
         else:
             self.cards = cards
-            self.hand_rank, self.high, \
-                self.next_high, self.kicker = PokerHandRank.classify_hand(cards)
-                    
+            self.strength = hand_strength(cards)
+            self.hand_rank = _HAND_RANKS[self.strength >> 20]
+
+    #the cards classify_hand picks, only computed when asked for
+    @cached_property
+    def _classified(self):
+        return PokerHandRank.classify_hand(self.cards)
+
+    @property
+    def high(self):
+        return self._classified[1]
+
+    @property
+    def next_high(self):
+        return self._classified[2]
+
+    @property
+    def kicker(self):
+        return self._classified[3]
+
     def beats(self, other):
-        if self.hand_rank > other.hand_rank:
-            return True 
-        elif other.hand_rank > self.hand_rank:
-            return False
-        else:
-            if self.hand_rank in (PokerHandRank.FOUR_OF_A_KIND,
-                                  PokerHandRank.FULL_HOUSE,
-                                  PokerHandRank.THREE_OF_A_KIND,
-                                  PokerHandRank.STRAIGHT_FLUSH,
-                                  PokerHandRank.STRAIGHT,
-                                  PokerHandRank.FLUSH,
-                                  PokerHandRank.HIGH_CARD):
-                return self.high > other.high 
-            elif self.hand_rank == PokerHandRank.TWO_PAIR: 
-                if self.high.rank > other.high.rank:
-                    return True
-                elif other.high.rank > self.high.rank:
-                    return False
-                elif self.next_high.rank > other.next_high.rank:
-                        return True
-                elif other.next_high.rank > self.next_high.rank:
-                        return False
-                else:  
-                    return self.kicker > other.kicker               
-            elif self.hand_rank == PokerHandRank.PAIR: 
-                if self.high.rank > other.high.rank:
-                    return True
-                elif other.high.rank > self.high.rank:
-                    return False
-                else: 
-                    return self.next_high > other.next_high               
+        return self.strength > other.strength
     
-    #hands are never equal
+    #hands compare by strength, hands of equal strength tie (are ==)
+    #for fast sorting use the int:  sorted(hands, key=attrgetter('strength'))
+    def __eq__(self, other):
+        if self.__class__ is other.__class__:
+            return self.strength == other.strength
+        return NotImplemented
+    def __hash__(self):
+        return hash(self.strength)
+    def __ge__(self, other):
+        if self.__class__ is other.__class__:
+            return self.strength >= other.strength
+        return NotImplemented
     def __gt__(self, other):
         if self.__class__ is other.__class__:
-            return self.beats(other)  
+            return self.strength > other.strength
+        return NotImplemented
+    def __le__(self, other):
+        if self.__class__ is other.__class__:
+            return self.strength <= other.strength
         return NotImplemented
     def __lt__(self, other):
         if self.__class__ is other.__class__:
-            return not self.beats(other)
+            return self.strength < other.strength
         return NotImplemented
 
@@ -1,6 +1,14 @@
 from poker import *
+import itertools
+import random
 import unittest
 
+try:
+    import numpy as np
+    import equity
+except ImportError:
+    np = None
+
 class TestPokerHands(unittest.TestCase):
     '''
         PlayingCard (Enum)
@@ -14,6 +22,16 @@ class TestPokerHands(unittest.TestCase):
     def test_get_card_from_rank_and_suit(self):
         self.assertEqual(PlayingCard.get_card(Rank.NINE, Suit.SPADES),
                     PlayingCard.NINE_OF_SPADES)    
+        for card in PlayingCard:
+            self.assertIs(PlayingCard.get_card(card.rank, card.suit), card)
+            self.assertEqual(card.name, 
+                             card.rank.name + '_OF_' + card.suit.name)
+
+    def test_shuffled_deck(self):
+        deck = shuffled_deck(random.Random(23))
+        self.assertEqual(sorted(deck), list(CARDS))
+        self.assertEqual(deck, shuffled_deck(random.Random(23)))
+        self.assertEqual(sorted(shuffled_codes()), list(range(52)))
 
     def test_invalid_card_count(self):
         self.assertRaises(ValueError,
@@ -143,6 +161,267 @@ class TestPokerHands(unittest.TestCase):
                           PlayingCard.JACK_OF_HEARTS])
         self.assertTrue(h2 > h1)
 
+    #lookup table evaluator
+    def reference_key(self, hand):
+        ''' tie-break order from the rules:  hand rank, then the ranks
+            by group size and rank, the wheel's ace counting as 1 '''
+        ranks = [c.rank.value[0] for c in hand.cards]
+        if sorted(ranks) == [2, 3, 4, 5, 14]:
+            ranks = [1 if r == 14 else r for r in ranks]
+        counts = {r: ranks.count(r) for r in ranks}
+        return (hand.hand_rank.value, 
+                sorted(counts, key=lambda r: (counts[r], r), reverse=True))
+
+    def assert_order(self, h1, h2):
+        k1, k2 = self.reference_key(h1), self.reference_key(h2)
+        self.assertEqual(h1.beats(h2), k1 > k2)
+        self.assertEqual(h1 == h2, k1 == k2)
+        self.assertEqual(h1 < h2, k1 < k2)
+
+    def test_strength_agrees_with_classify_hand(self):
+        rng = random.Random(17)
+        deck = list(PlayingCard)
+        hands = [PokerHand(rng.sample(deck, 5)) for i in range(3000)]
+        for h in hands:
+            self.assertEqual(h.hand_rank,
+                             PokerHandRank.classify_hand(h.cards)[0])
+        for h1, h2 in zip(hands, hands[1:]):
+            self.assert_order(h1, h2)
+
+    def test_strength_same_rank_hands(self):
+        #all straights and full houses of hearts and spades
+        deck = [c for c in PlayingCard if c.suit in (Suit.HEARTS, Suit.SPADES)]
+        hands = [PokerHand(list(cards)) 
+                 for cards in itertools.combinations(deck, 5)]
+        hands = [h for h in hands if h.hand_rank in 
+                 (PokerHandRank.STRAIGHT, PokerHandRank.FULL_HOUSE)]
+        for h1, h2 in itertools.combinations(hands[::7], 2):
+            self.assert_order(h1, h2)
+            self.assert_order(h2, h1)
+
+    def test_tie(self):
+        h1 = PokerHand([PlayingCard.NINE_OF_SPADES, PlayingCard.SIX_OF_SPADES,
+                        PlayingCard.FOUR_OF_CLUBS,PlayingCard.FOUR_OF_HEARTS, 
+                        PlayingCard.SEVEN_OF_DIAMONDS])
+        h2 = PokerHand([PlayingCard.NINE_OF_HEARTS, PlayingCard.SIX_OF_CLUBS,
+                        PlayingCard.FOUR_OF_DIAMONDS,PlayingCard.FOUR_OF_SPADES, 
+                        PlayingCard.SEVEN_OF_CLUBS])
+        self.assertEqual(h1, h2)
+        self.assertFalse(h1.beats(h2) or h2.beats(h1))
+        self.assertEqual(len({h1, h2}), 1)
+
+    def test_PAIR_kickers(self):
+        #same pair and top kicker, the 3rd kicker decides
+        h1 = PokerHand([PlayingCard.NINE_OF_SPADES, PlayingCard.SIX_OF_SPADES,
+                        PlayingCard.FOUR_OF_CLUBS,PlayingCard.FOUR_OF_HEARTS, 
+                        PlayingCard.TWO_OF_DIAMONDS])
+        h2 = PokerHand([PlayingCard.NINE_OF_HEARTS, PlayingCard.SIX_OF_CLUBS,
+                        PlayingCard.FOUR_OF_DIAMONDS,PlayingCard.FOUR_OF_SPADES, 
+                        PlayingCard.THREE_OF_CLUBS])
+        self.assertTrue(h2 > h1)
+
+    def test_wheel(self):
+        wheel = PokerHand([PlayingCard.ACE_OF_SPADES, PlayingCard.TWO_OF_SPADES,
+                           PlayingCard.THREE_OF_CLUBS,PlayingCard.FOUR_OF_HEARTS, 
+                           PlayingCard.FIVE_OF_DIAMONDS])
+        six_high = PokerHand([PlayingCard.SIX_OF_SPADES, PlayingCard.TWO_OF_HEARTS,
+                              PlayingCard.THREE_OF_CLUBS,PlayingCard.FOUR_OF_HEARTS, 
+                              PlayingCard.FIVE_OF_DIAMONDS])
+        trips = PokerHand([PlayingCard.ACE_OF_SPADES, PlayingCard.ACE_OF_HEARTS,
+                           PlayingCard.ACE_OF_CLUBS,PlayingCard.KING_OF_HEARTS, 
+                           PlayingCard.FIVE_OF_DIAMONDS])
+        self.assertEqual(wheel.hand_rank, PokerHandRank.STRAIGHT)
+        self.assertTrue(six_high > wheel > trips)
+
+    def test_sorted_hands(self):
+        rng = random.Random(20)
+        hands = [PokerHand(rng.sample(CARDS, 5)) for i in range(500)]
+        by_strength = [h.strength for h in sorted(hands)]
+        self.assertEqual(by_strength, sorted(h.strength for h in hands))
+
+    def test_lazy_high_cards(self):
+        hand = PokerHand([PlayingCard.NINE_OF_SPADES, PlayingCard.SIX_OF_SPADES,
+                          PlayingCard.FOUR_OF_CLUBS,PlayingCard.FOUR_OF_HEARTS, 
+                          PlayingCard.SEVEN_OF_DIAMONDS])
+        self.assertEqual(hand.high, PlayingCard.FOUR_OF_HEARTS)
+        self.assertEqual(hand.next_high, PlayingCard.NINE_OF_SPADES)
+        self.assertIsNone(hand.kicker)
+
+    #integer codes and bitmasks
+    def test_card_codes(self):
+        self.assertEqual([c.code for c in CARDS], list(range(52)))
+        for c in PlayingCard:
+            self.assertIs(PlayingCard.from_code(c.code), c)
+            self.assertEqual(code_rank(c.code), c.rank.value[0])
+            self.assertEqual(code_suit(c.code), c.suit.value[0])
+        self.assertTrue(all(c1 < c2 for c1, c2 in zip(CARDS, CARDS[1:])))
+
+    def test_hand_mask(self):
+        cards = [PlayingCard.ACE_OF_SPADES, PlayingCard.TWO_OF_SPADES,
+                 PlayingCard.KING_OF_CLUBS, PlayingCard.TEN_OF_HEARTS]
+        mask = cards_to_mask(cards)
+        self.assertEqual(bin(mask).count('1'), 4)
+        self.assertEqual(mask_to_cards(mask), sorted(cards))
+        self.assertEqual(suit_ranks(mask), 
+                         (1 << 11, 0, 1 << 8, 1 << 12 | 1))
+
+    def test_codes_strength(self):
+        rng = random.Random(18)
+        for i in range(1000):
+            cards = rng.sample(CARDS, 5)
+            self.assertEqual(codes_strength(cards_to_codes(cards)),
+                             hand_strength(cards))
+
+    #best 5 of 7
+    def test_best_strength(self):
+        rng = random.Random(22)
+        for ncards in (5, 6, 7):
+            for i in range(3000):
+                codes = rng.sample(range(52), ncards)
+                self.assertEqual(codes_best_strength(codes),
+                                 max(codes_strength(hand) for hand in 
+                                     itertools.combinations(codes, 5)))
+
+    def test_best_strength_cases(self):
+        P = PlayingCard
+        cases = [
+            #straight flush with a higher card of the suit
+            [P.NINE_OF_HEARTS, P.EIGHT_OF_HEARTS, P.SEVEN_OF_HEARTS,
+             P.SIX_OF_HEARTS, P.FIVE_OF_HEARTS, P.ACE_OF_HEARTS, 
+             P.NINE_OF_SPADES],
+            #four of a kind and three of a kind
+            [P.TWO_OF_CLUBS, P.TWO_OF_DIAMONDS, P.TWO_OF_HEARTS, 
+             P.TWO_OF_SPADES, P.KING_OF_CLUBS, P.KING_OF_DIAMONDS,
+             P.KING_OF_HEARTS],
+            #two three of a kinds
+            [P.FOUR_OF_CLUBS, P.FOUR_OF_DIAMONDS, P.FOUR_OF_HEARTS, 
+             P.JACK_OF_SPADES, P.JACK_OF_CLUBS, P.JACK_OF_DIAMONDS,
+             P.ACE_OF_HEARTS],
+            #three pairs
+            [P.FOUR_OF_CLUBS, P.FOUR_OF_DIAMONDS, P.TEN_OF_HEARTS, 
+             P.TEN_OF_SPADES, P.QUEEN_OF_CLUBS, P.QUEEN_OF_DIAMONDS,
+             P.TWO_OF_HEARTS],
+            #wheel and a six-card straight
+            [P.ACE_OF_CLUBS, P.TWO_OF_DIAMONDS, P.THREE_OF_HEARTS, 
+             P.FOUR_OF_SPADES, P.FIVE_OF_CLUBS, P.KING_OF_DIAMONDS,
+             P.KING_OF_HEARTS],
+            [P.ACE_OF_CLUBS, P.TWO_OF_DIAMONDS, P.THREE_OF_HEARTS, 
+             P.FOUR_OF_SPADES, P.FIVE_OF_CLUBS, P.SIX_OF_DIAMONDS,
+             P.KING_OF_HEARTS],
+            #flush and straight
+            [P.TEN_OF_CLUBS, P.JACK_OF_CLUBS, P.QUEEN_OF_HEARTS, 
+             P.KING_OF_CLUBS, P.ACE_OF_CLUBS, P.TWO_OF_CLUBS,
+             P.NINE_OF_HEARTS],
+        ]
+        expected = [PokerHandRank.STRAIGHT_FLUSH, PokerHandRank.FOUR_OF_A_KIND,
+                    PokerHandRank.FULL_HOUSE, PokerHandRank.TWO_PAIR,
+                    PokerHandRank.STRAIGHT, PokerHandRank.STRAIGHT,
+                    PokerHandRank.FLUSH]
+        for cards, hand_rank in zip(cases, expected):
+            strength = best_strength(cards)
+            self.assertEqual(strength >> 20, hand_rank.value)
+            self.assertEqual(strength, 
+                             max(PokerHand(list(hand)) for hand in 
+                                 itertools.combinations(cards, 5)).strength)
+
+    #batch classification
+    @unittest.skipIf(np is None, 'needs numpy')
+    def test_classify_many(self):
+        rng = random.Random(19)
+        hands = [rng.sample(range(52), 5) for i in range(5000)]
+        hands.append(cards_to_codes([PlayingCard.ACE_OF_SPADES, 
+                                     PlayingCard.JACK_OF_SPADES,
+                                     PlayingCard.QUEEN_OF_SPADES,
+                                     PlayingCard.TEN_OF_SPADES, 
+                                     PlayingCard.KING_OF_SPADES]))
+        hand_ranks, strengths = classify_many(np.array(hands, dtype=np.uint8),
+                                              chunk_size=1000)
+        for codes, hand_rank, strength in zip(hands, hand_ranks, strengths):
+            self.assertEqual(strength, codes_strength(codes))
+            self.assertEqual(hand_rank, strength >> 20)
+        self.assertEqual(hand_ranks[-1], PokerHandRank.STRAIGHT_FLUSH.value)
+
+    @unittest.skipIf(np is None, 'needs numpy')
+    def test_full_deck_hand_rank_counts(self):
+        codes = np.fromiter(itertools.chain.from_iterable(
+                                itertools.combinations(range(52), 5)),
+                            dtype=np.uint8).reshape(-1, 5)
+        hand_ranks, strengths = classify_many(codes)
+        counts = np.bincount(hand_ranks, minlength=10)
+        for hand_rank, count in HAND_RANK_COUNTS.items():
+            self.assertEqual(counts[hand_rank.value], count, hand_rank)
+        self.assertEqual(len(np.unique(strengths)), 7462)
+
+    @unittest.skipIf(np is None, 'needs numpy')
+    def test_classify_many_invalid(self):
+        self.assertRaises(ValueError, classify_many, np.zeros((3, 4), int))
+        self.assertRaises(ValueError, classify_many, [[0, 1, 2, 3, 52]])
+        self.assertRaises(ValueError, classify_many, [[0, 1, 2, 3, 3]])
+
+    #equity
+    @unittest.skipIf(np is None, 'needs numpy')
+    def test_equity_deal_totals(self):
+        rng = random.Random(21)
+        known = (51, 38)        #ace of spades, ace of hearts
+        rest = [code for code in range(52) if code not in known]
+        deals = np.array([rng.sample(rest, 13) for i in range(2000)],
+                         dtype=np.uint8)
+        wins = ties = 0
+        total = 0.0
+        for deal in deals.tolist():
+            hero = codes_strength(list(known) + deal[:3])
+            others = [codes_strength(deal[j:j + 5]) for j in (3, 8)]
+            wins += hero > max(others)
+            ties += hero == max(others)
+            if hero >= max(others):
+                total += 1 / (1 + others.count(hero))
+        n, nwins, nties, eq_sum, eq_sq = equity._deal_totals(known, deals, 2)
+        self.assertEqual((n, nwins, nties), (2000, wins, ties))
+        self.assertAlmostEqual(eq_sum, total)
+
+    @unittest.skipIf(np is None, 'needs numpy')
+    def test_equity_seeded(self):
+        cards = [PlayingCard.ACE_OF_SPADES, PlayingCard.ACE_OF_HEARTS]
+        one = equity.equity(cards, 2, trials=1 << 17, seed=7, max_workers=1)
+        two = equity.equity(cards, 2, trials=1 << 17, seed=7, max_workers=2)
+        self.assertEqual(one, two)
+        self.assertFalse(one['exact'])
+        self.assertAlmostEqual(one['win'] + one['tie'] + one['lose'], 1)
+        self.assertTrue(0.8 < one['equity'] < 0.9)
+        self.assertTrue(0 < one['equity_ci'] < 0.005)
+        royal = [PlayingCard.get_card(rank, Suit.SPADES) 
+                 for rank in (Rank.ACE, Rank.KING, Rank.QUEEN, Rank.JACK, 
+                              Rank.TEN)]
+        #the royal flushes of the other suits tie, none beat it
+        result = equity.equity(royal, 1, trials=1 << 14, seed=21, 
+                               exact_limit=0)
+        self.assertFalse(result['exact'])
+        self.assertEqual(result['lose'], 0)
+
+    @unittest.skipIf(np is None, 'needs numpy')
+    def test_equity_exact(self):
+        self.assertEqual(equity.count_deals(5, 1), 1533939)
+        self.assertEqual(equity.count_deals(0, 1), 2598960 * 1533939)
+        prefixes = list(itertools.islice(
+                            equity._prefixes(list(range(45)), 2, 2), 2))
+        self.assertEqual(prefixes[0], ((0, 1, 2, 3, 4, 5, 6), 
+                                       list(range(7, 45))))
+        self.assertEqual(prefixes[1][0], (0, 1, 2, 3, 4, 5, 7))
+        self.assertEqual(len(equity._combinations(47, 5)), 1533939)
+        royal = [PlayingCard.get_card(rank, Suit.SPADES) 
+                 for rank in (Rank.ACE, Rank.KING, Rank.QUEEN, Rank.JACK, 
+                              Rank.TEN)]
+        result = equity.equity(royal, 1)
+        self.assertTrue(result['exact'])
+        self.assertEqual(result['deals'], 1533939)
+        self.assertEqual(result['lose'], 0)
+        self.assertEqual(result['tie'], 3 / 1533939)
+        self.assertEqual(result['equity'], 1 - 1.5 / 1533939)
+        self.assertEqual(result['equity_ci'], 0)
+        self.assertRaises(ValueError, equity.equity, 
+                          [PlayingCard.ACE_OF_SPADES] * 2, 1)
+        self.assertRaises(ValueError, equity.equity, [], 10)
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,278 @@
+'''
+        Game of Life engines that only pay for the live cells
+
+        life_step_1 (GameOfLife_numpy.ipynb) counts the neighbors of
+        every cell of the grid with eight np.roll calls, so a
+        generation costs the same for a nearly empty grid as for a
+        full one;  both engines here give the same generations as
+        life_step_1 on a torus of the same size
+
+        SparseLife:  the live cells as a sorted array of flat indices,
+        row * ncols + col;  a generation counts the neighbors of the
+        live cells only (np.unique of their 8 neighbor indices), so it
+        costs O(live cells), for any grid shape
+
+        HashLife:  Gosper's Hashlife on a 2**k x 2**k torus;  the grid
+        is a quadtree of shared (hash-consed) nodes, and the result of
+        advancing a node is memoized on it, so repeating and periodic
+        patterns run billions of generations in a few steps;  the torus
+        is advanced as a periodic tiling of copies of itself, which the
+        quadtree holds at no extra cost;  the nodes are shared by all
+        HashLife grids of the process, clear() drops them between runs
+
+        the engines are checked against life_step_1 in test_sparselife.py
+
+        usage:  python sparselife.py   (a glider, 4 billion generations on)
+'''
+
+import numpy as np
+
+
+def life_step_1(X):
+    """Game of life step using generator expressions"""
+    nbrs_count = sum(np.roll(np.roll(X, i, 0), j, 1)
+                     for i in (-1, 0, 1) for j in (-1, 0, 1)
+                     if (i != 0 or j != 0))
+    return (nbrs_count == 3) | (X & (nbrs_count == 2))
+
+
+_OFFSETS = [(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1) if (i != 0 or j != 0)]
+_DROWS = np.array([i for i, j in _OFFSETS])
+_DCOLS = np.array([j for i, j in _OFFSETS])
+
+
+class SparseLife():
+    ''' live cells of an nrows x ncols torus '''
+
+    def __init__(self, cells, shape):
+        ''' cells:  iterable of (row, col) of the live cells '''
+        self.shape = shape
+        self.generation = 0
+        cells = np.array(list(cells), dtype=np.int64).reshape(-1, 2)
+        self.live = np.unique(cells[:, 0] % shape[0] * shape[1]
+                              + cells[:, 1] % shape[1])
+
+    @classmethod
+    def from_array(cls, X):
+        return cls(np.argwhere(X), X.shape)
+
+    def to_array(self):
+        X = np.zeros(self.shape, dtype=bool)
+        X.flat[self.live] = True
+        return X
+
+    @property
+    def cells(self):
+        ''' (row, col) of the live cells, in row order '''
+        return [divmod(int(i), self.shape[1]) for i in self.live]
+
+    @property
+    def population(self):
+        return len(self.live)
+
+    def step(self, n=1):
+        nrows, ncols = self.shape
+        for i in range(n):
+            rows, cols = np.divmod(self.live, ncols)
+            #every neighbor of every live cell, once per live neighbor
+            nbrs = ((rows[:, None] + _DROWS) % nrows * ncols
+                    + (cols[:, None] + _DCOLS) % ncols)
+            cand, nbrs_count = np.unique(nbrs, return_counts=True)
+            alive = np.isin(cand, self.live, assume_unique=True)
+            self.live = cand[(nbrs_count == 3) | (alive & (nbrs_count == 2))]
+        self.generation += n
+        return self
+
+
+#Hashlife
+#
+#a node of level k is a 2**k x 2**k square of cells with 4 quadrant
+#nodes of level k - 1, the cells are the two nodes of level 0;  there
+#is only one node for each content (join), so equal squares anywhere
+#in space or time are the same object, and what is computed for one
+#is reused for all of them
+
+class _Node():
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population', 'next')
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.population = population
+        self.next = {}      #j: center advanced 2**j generations
+
+
+_OFF = _Node(0, None, None, None, None, 0)
+_ON = _Node(0, None, None, None, None, 1)
+_nodes = {}             #(nw, ne, sw, se): node
+_empty = [_OFF]         #by level
+
+
+def clear():
+    ''' forget all the nodes and their memoized successors, e.g. between
+        runs, the table only grows;  existing HashLife grids still work,
+        but no longer share nodes with the new ones '''
+    _nodes.clear()
+    del _empty[1:]
+
+
+def _join(nw, ne, sw, se):
+    key = (nw, ne, sw, se)
+    node = _nodes.get(key)
+    if node is None:
+        node = _nodes[key] = _Node(nw.level + 1, nw, ne, sw, se,
+                                   nw.population + ne.population
+                                   + sw.population + se.population)
+    return node
+
+
+def _empty_node(level):
+    while len(_empty) <= level:
+        e = _empty[-1]
+        _empty.append(_join(e, e, e, e))
+    return _empty[level]
+
+
+def _life_4x4(m):
+    ''' the center 2 x 2 of a level 2 node after one generation '''
+    rows = [(m.nw.nw, m.nw.ne, m.ne.nw, m.ne.ne),
+            (m.nw.sw, m.nw.se, m.ne.sw, m.ne.se),
+            (m.sw.nw, m.sw.ne, m.se.nw, m.se.ne),
+            (m.sw.sw, m.sw.se, m.se.sw, m.se.se)]
+    grid = [[c.population for c in row] for row in rows]
+    result = []
+    for r, c in ((1, 1), (1, 2), (2, 1), (2, 2)):
+        nbrs_count = sum(grid[r + i][c + j] for i, j in _OFFSETS)
+        alive = nbrs_count == 3 or (grid[r][c] and nbrs_count == 2)
+        result.append(_ON if alive else _OFF)
+    return _join(*result)
+
+
+def _successor(m, j):
+    ''' the center of node m (level k >= 2, one level down) advanced
+        2**j generations, j <= k - 2 '''
+    result = m.next.get(j)
+    if result is not None:
+        return result
+    if m.population == 0:
+        result = m.nw
+    elif m.level == 2:
+        result = _life_4x4(m)
+    else:
+        nw, ne, sw, se = m.nw, m.ne, m.sw, m.se
+        #the 9 overlapping level k - 1 squares, advanced
+        jc = min(j, m.level - 3)
+        c = [_successor(_join(*quads), jc) for quads in (
+                (nw.nw, nw.ne, nw.sw, nw.se),
+                (nw.ne, ne.nw, nw.se, ne.sw),
+                (ne.nw, ne.ne, ne.sw, ne.se),
+                (nw.sw, nw.se, sw.nw, sw.ne),
+                (nw.se, ne.sw, sw.ne, se.nw),
+                (ne.sw, ne.se, se.nw, se.ne),
+                (sw.nw, sw.ne, sw.sw, sw.se),
+                (sw.ne, se.nw, sw.se, se.sw),
+                (se.nw, se.ne, se.sw, se.se))]
+        if j < m.level - 2:
+            #far enough, only the centers of the 9 are needed
+            result = _join(_join(c[0].se, c[1].sw, c[3].ne, c[4].nw),
+                           _join(c[1].se, c[2].sw, c[4].ne, c[5].nw),
+                           _join(c[3].se, c[4].sw, c[6].ne, c[7].nw),
+                           _join(c[4].se, c[5].sw, c[7].ne, c[8].nw))
+        else:
+            #the 9 are 2**(k-3) on, as much again for the 4 quadrants
+            result = _join(_successor(_join(c[0], c[1], c[3], c[4]), j - 1),
+                           _successor(_join(c[1], c[2], c[4], c[5]), j - 1),
+                           _successor(_join(c[3], c[4], c[6], c[7]), j - 1),
+                           _successor(_join(c[4], c[5], c[7], c[8]), j - 1))
+    m.next[j] = result
+    return result
+
+
+class HashLife():
+    ''' a 2**k x 2**k torus (k >= 2) as a Hashlife quadtree '''
+
+    def __init__(self, X):
+        ''' X:  square boolean array with a power of 2 side '''
+        size = X.shape[0]
+        if X.shape != (size, size) or size < 4 or size & (size - 1):
+            raise ValueError('HashLife needs a square grid, '
+                             'a power of 2 of at least 4 cells wide')
+        self.shape = X.shape
+        self.level = size.bit_length() - 1
+        self.generation = 0
+
+        def build(r, c, level):
+            if level == 0:
+                return _ON if X[r, c] else _OFF
+            if not X[r:r + (1 << level), c:c + (1 << level)].any():
+                return _empty_node(level)
+            h = 1 << level - 1
+            return _join(build(r, c, level - 1), build(r, c + h, level - 1),
+                         build(r + h, c, level - 1),
+                         build(r + h, c + h, level - 1))
+        self.root = build(0, 0, self.level)
+
+    def to_array(self):
+        X = np.zeros(self.shape, dtype=bool)
+
+        def fill(node, r, c):
+            if node.population == 0:
+                return
+            if node.level == 0:
+                X[r, c] = True
+                return
+            h = 1 << node.level - 1
+            fill(node.nw, r, c)
+            fill(node.ne, r, c + h)
+            fill(node.sw, r + h, c)
+            fill(node.se, r + h, c + h)
+        fill(self.root, 0, 0)
+        return X
+
+    @property
+    def population(self):
+        return self.root.population
+
+    def _advance(self, j):
+        ''' the torus 2**j generations on:  the center of a tiling of
+            copies of it, advanced, is the torus shifted by a quarter
+            of the tiling's width, which is a whole number of tori for
+            a tiling of 4 x 4 or more;  a 2 x 2 tiling (for the
+            smallest steps) is shifted by half a torus, undone by
+            swapping the quadrants diagonally '''
+        k = self.level
+        tiles = self.root
+        for i in range(max(1, j - k + 2)):
+            tiles = _join(tiles, tiles, tiles, tiles)
+        result = _successor(tiles, j)
+        if result.level == k:
+            self.root = _join(result.se, result.sw, result.ne, result.nw)
+            return
+        while result.level > k:
+            result = result.nw
+        self.root = result
+
+    def step(self, n=1):
+        ''' advance n generations, one memoized step per bit of n '''
+        for j in range(n.bit_length()):
+            if n >> j & 1:
+                self._advance(j)
+        self.generation += n
+        return self
+
+
+def main():
+    glider = [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
+
+    #a glider on a 1024 torus is back where it started every 4096 generations
+    X = np.zeros((1024, 1024), dtype=bool)
+    X[tuple(np.array(glider).T)] = True
+    hashlife = HashLife(X).step(4096 * 10**6)
+    print('glider after {:,} generations: population {}, back at the start: {}'
+          .format(hashlife.generation, hashlife.population,
+                  (hashlife.to_array() == X).all()))
+    print('{:,} nodes'.format(len(_nodes)))
+
+
+if __name__ == "__main__":
+    main()
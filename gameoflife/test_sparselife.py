@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+import sparselife
+from sparselife import SparseLife, HashLife, life_step_1
+
+GLIDER = [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
+
+
+class TestSparseLife(unittest.TestCase):
+    '''
+        SparseLife - live cells as flat indices, against life_step_1
+    '''
+
+    def test_life_step_1(self):
+        rng = np.random.default_rng(25)
+        for shape in ((4, 4), (5, 7), (32, 48), (64, 64)):
+            X = rng.random(shape) < 0.3
+            sparse = SparseLife.from_array(X)
+            for i in range(50):
+                X = life_step_1(X)
+                self.assertTrue((sparse.step().to_array() == X).all(),
+                                (shape, i))
+            self.assertEqual(sparse.generation, 50)
+            self.assertEqual(sparse.population, X.sum())
+
+    def test_cells(self):
+        sparse = SparseLife(GLIDER, (8, 10))
+        self.assertEqual(sparse.cells, sorted(GLIDER))
+        #a glider moves one cell down and right every 4 generations
+        sparse.step(4)
+        self.assertEqual(sparse.cells, sorted((r + 1, c + 1)
+                                              for r, c in GLIDER))
+        self.assertEqual(SparseLife([(-1, 10)], (8, 10)).cells, [(7, 0)])
+
+
+class TestHashLife(unittest.TestCase):
+    '''
+        HashLife - quadtree of shared nodes, against life_step_1
+    '''
+
+    def test_life_step_1(self):
+        rng = np.random.default_rng(25)
+        for size in (4, 16, 64):
+            X = rng.random((size, size)) < 0.3
+            for n in (1, 1, 2, 3, 5, 8, 13, 40):
+                hashlife = HashLife(X).step(n)
+                for i in range(n):
+                    X = life_step_1(X)
+                self.assertTrue((hashlife.to_array() == X).all(), (size, n))
+                self.assertEqual(hashlife.population, X.sum())
+
+    def test_glider(self):
+        #back where it started every 4096 generations on a 1024 torus
+        X = np.zeros((1024, 1024), dtype=bool)
+        X[tuple(np.array(GLIDER).T)] = True
+        hashlife = HashLife(X).step(4096 * 10**6)
+        self.assertEqual(hashlife.generation, 4096 * 10**6)
+        self.assertEqual(hashlife.population, 5)
+        self.assertTrue((hashlife.to_array() == X).all())
+
+    def test_clear(self):
+        rng = np.random.default_rng(3)
+        X = rng.random((16, 16)) < 0.3
+        before = HashLife(X).step(5)
+        self.assertGreater(len(sparselife._nodes), 0)
+        sparselife.clear()
+        self.assertEqual(len(sparselife._nodes), 0)
+        after = HashLife(X).step(5)
+        self.assertTrue((after.to_array() == before.to_array()).all())
+        #the grid from before the clear goes on as before
+        for i in range(5 + 7):
+            X = life_step_1(X)
+        self.assertTrue((before.step(7).to_array() == X).all())
+
+    def test_bad_shape(self):
+        for shape in ((8, 16), (2, 2), (12, 12)):
+            self.assertRaises(ValueError, HashLife, np.zeros(shape, dtype=bool))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,56 +1,335 @@
 '''
 Basic YAML Schema Validation (via JSON)
 load schema.yml
-convert to json 
+convert to json
 load config.yml
 convert to json, then validate and pass through or raise exception
 
+batch mode:  any number of configs, directories (all *.yml / *.yaml
+below them) or glob patterns after the schema;  the schema is checked
+and compiled once per process, the files are validated in parallel,
+and every error of a file is reported, not only the first
+
+the yaml files are parsed with libyaml's CSafeLoader when PyYAML has
+it (pure Python SafeLoader otherwise);  with --cache, the validation
+results are kept on disk as json by the file's content hash and the
+schema's, so on a rerun unchanged configs are neither parsed nor
+validated again;  the cache holds only error strings, nothing in it
+is ever executed
+
+with --stream, each file may hold any number of yaml documents (---),
+e.g. a bulk export:  the documents are read, validated and reported one
+at a time, so memory does not grow with the file;  the cache is not
+used then
+
+usage:  bysv [--cache <dir>] [--stream] <schema.yml> <config.yml | dir | 'glob'> ...
 '''
+import glob
+import hashlib
 import json
+import os
+import tempfile
 import yaml
 import jsonschema, jsonschema.exceptions
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# libyaml is several times faster, the results are the same
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+_validators = {}    # schema as canonical json: compiled validator
+
+
+def load_yaml(stream):
+    ''' yaml.safe_load with the fastest safe loader available '''
+    return yaml.load(stream, Loader=Loader)
+
 
 def is_valid_config(schema, config):
-    
-    try:    
-        jsonschema.Draft4Validator.check_schema(schema)    
+
+    try:
+        validator = get_validator(schema)
     except jsonschema.exceptions.SchemaError as e:
-        print(e) 
+        print(e)
         return False
     print('schema is valid')
 
     try:
-        jsonschema.validate(config, schema)
-    except jsonschema.exceptions.ValidationError as e:
-        print(e) 
-        return False
+        errors = config_errors(validator, config)
     except Exception as e2:
         print('e2: ', e2)
-        return False    
+        return False
+    for error in errors:
+        print(error)
+
+    return not errors
+
+
+def compile_validator(schema):
+    ''' check the schema once and return a reusable validator,
+        raises jsonschema.exceptions.SchemaError for a bad schema
+        use validator.iter_errors(config) for all the errors of a config '''
+    jsonschema.Draft4Validator.check_schema(schema)
+    return jsonschema.Draft4Validator(schema)
+
+
+def get_validator(schema):
+    ''' compile_validator, cached by the schema's content '''
+    key = json.dumps(schema, sort_keys=True)
+    if key not in _validators:
+        _validators[key] = compile_validator(schema)
+    return _validators[key]
+
+
+def schema_digest(schema):
+    ''' hash of the schema's content, part of the cache key '''
+    return hashlib.sha256(
+        json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    ''' on-disk cache, one json file per config content hash holding
+        the errors found for each schema (by schema_digest);  safe to
+        share between processes, entries are replaced atomically
+        a file that is not a valid entry counts as missing, and an
+        entry that cannot be written is skipped '''
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.cache_dir, digest + '.json')
+
+    def load(self, digest):
+        ''' the entry {'errors': {schema: [...]}}, with 'load_errors'
+            for a file that is not yaml, or None '''
+        try:
+            with open(self._path(digest), encoding='utf8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not (isinstance(entry, dict) and isinstance(entry.get('errors'),
+                                                       dict)
+                and all(_is_error_list(errors)
+                        for errors in entry['errors'].values())
+                and _is_error_list(entry.get('load_errors', []))):
+            return None
+        return entry
+
+    def save(self, digest, entry):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(digest))
+        except OSError:
+            os.remove(tmp_path)
+
+
+def _is_error_list(errors):
+    return isinstance(errors, list) and all(isinstance(e, str) for e in errors)
+
+
+def config_errors(validator, config):
+    ''' all the validation errors of a config, as strings '''
+    return ['{}: {}'.format(
+                '/'.join(str(p) for p in e.absolute_path) or '<root>',
+                e.message)
+            for e in sorted(validator.iter_errors(config),
+                            key=lambda e: [str(p) for p in e.absolute_path])]
 
-    return True
-    
-    
-def main(schema_file_path, config_file_path):
+
+def expand_paths(args, missing=None):
+    ''' config files from file names, directories and glob patterns
+        the directories and patterns that match no file are appended
+        to the list `missing` '''
+    paths = []
+    for arg in args:
+        found = []
+        if os.path.isdir(arg):
+            for pattern in ('**/*.yml', '**/*.yaml'):
+                found.extend(sorted(glob.glob(os.path.join(arg, pattern),
+                                              recursive=True)))
+        elif glob.has_magic(arg):
+            found = sorted(glob.glob(arg, recursive=True))
+        else:
+            found = [arg]
+        if not found and missing is not None:
+            missing.append(arg)
+        paths.extend(found)
+    return paths
+
+
+_worker = {}    # per process: validator, schema digest, cache
+
+def _init_worker(schema, cache_dir=None):
+    _worker['validator'] = get_validator(schema)
+    _worker['schema'] = schema_digest(schema)
+    _worker['cache'] = ResultCache(cache_dir) if cache_dir else None
+
+
+def validate_file(config_file_path):
+    ''' returns (path, list of errors, cached) for the schema of 
+        _init_worker, unreadable files are errors too;
+        cached is True if the result came from the cache '''
+    cache = _worker['cache']
+    try:
+        with open(config_file_path, 'rb') as f_config:
+            data = f_config.read()
+    except OSError as e:
+        return config_file_path, [str(e)], False
+
+    digest = hashlib.sha256(data).hexdigest()
+    entry = cache.load(digest) if cache else None
+    if entry is not None:
+        if 'load_errors' in entry:
+            return config_file_path, entry['load_errors'], True
+        if _worker['schema'] in entry['errors']:
+            return config_file_path, entry['errors'][_worker['schema']], True
+
+    # new file, or a schema not seen for it:  parse and validate
+    if entry is None:
+        entry = {'errors': {}}
+    try:
+        doc = load_yaml(data)
+    except yaml.YAMLError as e:
+        # not a document, the same errors for any schema
+        errors = entry['load_errors'] = [str(e)]
+    else:
+        errors = config_errors(_worker['validator'], doc)
+        entry['errors'][_worker['schema']] = errors
+    if cache:
+        cache.save(digest, entry)
+    return config_file_path, errors, False
+
+
+def iter_document_errors(config_file_path, validator):
+    ''' yields (index, list of errors) for each document of a
+        multi-document file as it is read, only one document is in
+        memory at a time;  a yaml error is reported for the document
+        it occurs in and ends the file '''
+    with open(config_file_path, 'rb') as f_config:
+        docs = yaml.load_all(f_config, Loader=Loader)
+        index = 0
+        while True:
+            try:
+                doc = next(docs)
+            except StopIteration:
+                return
+            except yaml.YAMLError as e:
+                yield index, [str(e)]
+                return
+            yield index, config_errors(validator, doc)
+            index += 1
+
+
+def validate_files(schema, paths, max_workers=None, cache_dir=None):
+    ''' validate config files against one schema, in parallel
+        for more than a few files;  yields (path, errors, cached) in order
+        cache_dir: directory of a ResultCache, None for no cache '''
+    _init_worker(schema, cache_dir)    # a bad schema fails here
+    if len(paths) < 4 or max_workers == 1:
+        for path in paths:
+            yield validate_file(path)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(schema, cache_dir)) as executor:
+        yield from executor.map(validate_file, paths,
+                                chunksize=max(1, len(paths) // 64))
+
+
+def stream_files(schema, paths):
+    ''' validate every document of each file, yields 
+        (path, index, errors) as the documents are read '''
+    validator = get_validator(schema)
+    for path in paths:
+        try:
+            for index, errors in iter_document_errors(path, validator):
+                yield path, index, errors
+        except OSError as e:
+            yield path, None, [str(e)]
+
+
+def main_stream(schema, paths):
+    ''' main for --stream, returns the number of invalid documents '''
+    nvalid = ninvalid = 0
+    for path, index, errors in stream_files(schema, paths):
+        name = path if index is None else '{}[{}]'.format(path, index)
+        if errors:
+            ninvalid += 1
+            print('{}: invalid'.format(name))
+            for error in errors:
+                print('    {}'.format(error.replace('\n', '\n    ')))
+        else:
+            nvalid += 1
+            print('{}: config is valid'.format(name))
+    print('{} valid, {} invalid documents'.format(nvalid, ninvalid))
+    return ninvalid
+
+
+def main(schema_file_path, *config_args, cache_dir=None, stream=False):
+    ''' returns the number of invalid configs (documents with stream)
+        plus the number of directories and patterns without configs '''
 
     try:
         with open(schema_file_path) as f_schema:
-            schema = yaml.safe_load(f_schema)
-        with open(config_file_path) as f_config:
-            config = yaml.safe_load(f_config)                
-    except OSError as e:  
-        print(e)  
-
-    print('loaded schema.yml and config.yml')
-    
-    if is_valid_config(schema, config):
-        print('config is valid')
-            
-        
+            schema = load_yaml(f_schema)
+    except OSError as e:
+        print(e)
+        return 1
+
+    try:
+        get_validator(schema)
+    except jsonschema.exceptions.SchemaError as e:
+        print(e)
+        return 1
+    print('schema is valid')
+
+    missing = []
+    paths = expand_paths(config_args, missing)
+    for arg in missing:
+        print('{}: no config files'.format(arg))
+    if stream:
+        return main_stream(schema, paths) + len(missing)
+
+    nvalid = ninvalid = ncached = 0
+    for path, errors, cached in validate_files(schema, paths,
+                                               cache_dir=cache_dir):
+        ncached += cached
+        if errors:
+            ninvalid += 1
+            print('{}: invalid'.format(path))
+            for error in errors:
+                print('    {}'.format(error.replace('\n', '\n    ')))
+        else:
+            nvalid += 1
+            print('{}: config is valid'.format(path))
+    if nvalid + ninvalid > 1:
+        print('{} valid, {} invalid'.format(nvalid, ninvalid))
+    if cache_dir:
+        print('{} unchanged, from the cache'.format(ncached))
+    return ninvalid + len(missing)
+
+
 if __name__ == "__main__":
-    if len(sys.argv) == 3:            
-        main(sys.argv[1], sys.argv[2])        
-    else:    
-        print('Usage:  bysv <schema.yml> <config.yml>')
- 
\ No newline at end of file
+    args = sys.argv[1:]
+    cache_dir = None
+    stream = False
+    while args and args[0] in ('--cache', '--stream'):
+        if args[0] == '--stream':
+            stream = True
+            args = args[1:]
+        elif len(args) >= 2:
+            cache_dir = args[1]
+            args = args[2:]
+        else:
+            break
+    if len(args) >= 2:
+        sys.exit(1 if main(*args, cache_dir=cache_dir, stream=stream) else 0)
+    else:
+        print('Usage:  bysv [--cache <dir>] [--stream] <schema.yml> '
+              '<config.yml | dir | glob> ...')
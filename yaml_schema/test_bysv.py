@@ -0,0 +1,139 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import bysv
+
+_here = os.path.dirname(os.path.abspath(__file__))
+SCHEMA = os.path.join(_here, 'python_logging_config_schema_1.yml')
+CONFIG = os.path.join(_here, 'simple_logging_config_1.yml')
+
+
+class TestBatch(unittest.TestCase):
+    '''
+        expand_paths, main - batch validation of files, directories
+        and glob patterns
+    '''
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.empty_dir = os.path.join(self.tmpdir.name, 'empty')
+        os.mkdir(self.empty_dir)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def main(self, *args, **kwargs):
+        ''' bysv.main's return value and its output lines '''
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            result = bysv.main(SCHEMA, *args, **kwargs)
+        return result, out.getvalue().splitlines()
+
+    def test_expand_paths(self):
+        pattern = os.path.join(self.tmpdir.name, '*.yml')
+        missing = []
+        paths = bysv.expand_paths([CONFIG, self.empty_dir, pattern], missing)
+        self.assertEqual(paths, [CONFIG])
+        self.assertEqual(missing, [self.empty_dir, pattern])
+
+    def test_valid(self):
+        self.assertEqual(self.main(CONFIG),
+                         (0, ['schema is valid',
+                              '{}: config is valid'.format(CONFIG)]))
+
+    def test_no_files(self):
+        pattern = os.path.join(self.tmpdir.name, 'nothing*.yml')
+        for stream in (False, True):
+            result, lines = self.main(CONFIG, self.empty_dir, pattern,
+                                      stream=stream)
+            self.assertEqual(result, 2)
+            self.assertIn('{}: no config files'.format(self.empty_dir), lines)
+            self.assertIn('{}: no config files'.format(pattern), lines)
+
+
+class TestResultCache(unittest.TestCase):
+    '''
+        ResultCache - validation results by config content and schema
+    '''
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmpdir.name, 'cache')
+        self.config = os.path.join(self.tmpdir.name, 'config.yml')
+        shutil.copy(CONFIG, self.config)
+        with open(SCHEMA) as f:
+            self.schema = bysv.load_yaml(f)
+        bysv._init_worker(self.schema, self.cache_dir)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def validate(self):
+        path, errors, cached = bysv.validate_file(self.config)
+        return errors, cached
+
+    def entry_path(self):
+        entries = os.listdir(self.cache_dir)
+        self.assertEqual(len(entries), 1)
+        return os.path.join(self.cache_dir, entries[0])
+
+    def test_hit(self):
+        self.assertEqual(self.validate(), ([], False))
+        self.assertEqual(self.validate(), ([], True))
+        with open(self.entry_path()) as f:
+            self.assertEqual(json.load(f),
+                {'errors' : {bysv.schema_digest(self.schema) : []}})
+
+    def test_config_changed(self):
+        self.validate()
+        with open(self.config, 'w') as f:
+            f.write('version: 1\n')
+        errors, cached = self.validate()
+        self.assertFalse(cached)
+        self.assertIn("<root>: 'handlers' is a required property", errors)
+        self.assertEqual(self.validate(), (errors, True))
+        with open(self.config, 'w') as f:
+            f.write('version: [\n')
+        errors, cached = self.validate()
+        self.assertFalse(cached)
+        self.assertEqual(self.validate(), (errors, True))
+
+    def test_schema_changed(self):
+        self.validate()
+        schema = dict(self.schema, required=['version', 'filters'])
+        bysv._init_worker(schema, self.cache_dir)
+        self.assertEqual(self.validate(),
+                         (["<root>: 'filters' is a required property"], False))
+        self.assertEqual(self.validate()[1], True)
+        #both results are kept
+        bysv._init_worker(self.schema, self.cache_dir)
+        self.assertEqual(self.validate(), ([], True))
+
+    def test_bad_entry(self):
+        self.validate()
+        entry_path = self.entry_path()
+        for content in ('{"errors": ', '[]', '{"errors": {"x": 5}}', 
+                        '\xff\xfe'):
+            with open(entry_path, 'w', encoding='latin1') as f:
+                f.write(content)
+            self.assertEqual(self.validate(), ([], False), content)
+            self.assertEqual(self.validate(), ([], True), content)
+
+    def test_unreadable_entry(self):
+        self.validate()
+        entry_path = self.entry_path()
+        os.remove(entry_path)
+        os.mkdir(entry_path)
+        self.assertEqual(self.validate(), ([], False))
+        self.assertEqual(self.validate(), ([], False))
+        self.assertEqual(os.listdir(self.cache_dir),
+                         [os.path.basename(entry_path)])
+
+
+if __name__ == '__main__':
+    unittest.main()